@@ -1,5 +1,14 @@
 import cdstoolbox as ct
 
+from fwi import downsample, grid, planner, rollup, zonal
+from fwi.aggregates import ChunkStats, merge_all, to_cube
+from fwi.cache import memoize, retrieve
+from fwi.parallel import bounded, ordered_map
+from fwi.series import from_handle, get_series
+from fwi.summaries import box_summaries, box_trace, outlier_points
+from fwi.tracing import traced
+from fwi.yearly import get_store, totals
+
 DESCRIPTION = (
     '### The Fire Weather Index (FWI) system provides fire danger information '
     'following the European Forest Fire Information System (EFFIS) '
@@ -67,6 +76,16 @@ TIMES = [
     },
 ]
 
+FIRST_YEAR = 2006
+LAST_YEAR = 2098
+
+HISTORICAL_PERIOD = (1981, 2005)
+
+DATASET = 'sis-tourism-fire-danger-indicators'
+
+# Years of daily data fetched per catalogue request when filling the map
+DAILY_BATCH_SIZE = 2
+
 POSSIBLE_PERIODS = [
     '2006_2010', '2011_2015',
     '2016_2020', '2021_2025',
@@ -127,15 +146,22 @@ NO_DATA_REGIONS = [
 
 
 @ct.child()
-def intermediate(time, scenario, compare):
-    data = get_comparison_data(time, scenario, compare)
-    return data
-
-
-child_layout = ct.Layout(rows=3)
+@memoize
+def intermediate(time, scenario, compare, nuts_id=None, selectors=None):
+    # The region is selected here and its groups summarised in one pass, so
+    # only box statistics cross the service boundary and get cached
+    data = get_comparison_data(time, scenario, compare, nuts_id, selectors)
+    if not all(hasattr(d, 'dims') for d in data):
+        # Toolbox cubes are summarised by ct.chart.box in the child
+        return data
+    return box_summaries(data)
+
+
+child_layout = ct.Layout(rows=4)
 child_layout.add_widget(row=0, content='compare')
-child_layout.add_widget(row=1, content='output-0')
-child_layout.add_widget(row=2, content='output-1')
+child_layout.add_widget(row=1, content='zoom')
+child_layout.add_widget(row=2, content='output-0')
+child_layout.add_widget(row=3, content='output-1')
 
 
 
@@ -143,24 +169,31 @@ child_layout.add_widget(row=2, content='output-1')
 @ct.input.dropdown(
     'compare', values=COMPARISONS, label='Comparison',
 )
+@ct.input.slider(
+    'zoom', min=FIRST_YEAR, max=LAST_YEAR, step=1,
+    default=[FIRST_YEAR, LAST_YEAR],
+    label='Zoom',
+    description='Years of the daily chart to show at full resolution.',
+)
 @ct.output.markdown()
 @ct.output.livefigure()
 
 
-def fwi_future_child(params, time, scenario, daily_data, compare):
+@traced
+def fwi_future_child(params, time, scenario, gcm_model, compare, zoom=None, series=None):
     
     nuts_id = params['properties'].get('NUTS_ID')
     nuts_name = params['properties'].get('NUTS_NAME')
     if compare!='daily':
-        comparison_data = ct.orchestrate.child_service(
+        summaries = ct.orchestrate.child_service(
             'intermediate',
             args=dict(
                 time=time,
                 scenario=scenario,
-                compare=compare
+                compare=compare,
+                nuts_id=nuts_id,
             ),
         )
-        data = [ct.cube.select(res, nuts=nuts_id) for res in comparison_data]
     # Handle regions with no data
     if not params['properties'].get('value'):
         if not params['properties'].get('values'):
@@ -179,7 +212,11 @@ def fwi_future_child(params, time, scenario, daily_data, compare):
     fig = None
     
     if compare == 'daily':
-        data_sel = ct.cube.select(daily_data, nuts=params['properties']['NUTS_ID'])
+        # Only the zoomed window is read, and long windows are reduced to
+        # about one point per pixel keeping the danger class peaks
+        window = get_zoom_window(time, zoom)
+        data_sel = get_daily_series(window, scenario, gcm_model, nuts_id, series)
+        data_sel = downsample.downsample(data_sel)
         # Plot time series
         fig = ct.chart.line(
             data_sel,
@@ -192,11 +229,29 @@ def fwi_future_child(params, time, scenario, daily_data, compare):
                 'name': nuts_name
             }
         )  
-        title = f'## Comparison of **daily Fire Weather Index** for **{label_from_value(None, time)}** under **{label_from_value(RCPS, scenario)}** in **{nuts_name}**.' 
+        title = f'## Comparison of **daily Fire Weather Index** for **{label_from_value(None, window)}** under **{label_from_value(RCPS, scenario)}** in **{nuts_name}**.' 
     
     else:
-        # Add box plot for each data to the livefigure
-        for i,d in enumerate(data):
+        # Add a box plot for each group from its precomputed summary
+        for i,summary in enumerate(summaries):
+            if not isinstance(summary, dict):
+                fig = ct.chart.box(
+                    summary,
+                    layout_kwargs={
+                        'title': '',
+                        'xaxis': {'title': ''},
+                        'yaxis': {'title': 'Mean fire risk by model'}
+                    },
+                    box_kwargs={
+                        'name': names[i],
+                        'hovertext':hover_names,
+                        'mean':[ct.cube.average(summary)],
+                        'boxmean':True
+                    },
+                    fig=fig
+                )
+                continue
+            d, box_kwargs = box_trace(summary, names[i])
             fig = ct.chart.box(
                 d,
                 layout_kwargs={
@@ -205,24 +260,34 @@ def fwi_future_child(params, time, scenario, daily_data, compare):
                     'yaxis': {'title': 'Mean fire risk by model'}
                 },
                 box_kwargs={
-                    'name': names[i],
+                    **box_kwargs,
                     'hovertext':hover_names,
-                    'mean':[ct.cube.average(d)],
-                    'boxmean':True
                 },
                 fig=fig
             )
+            outliers = outlier_points(summary, names[i])
+            if outliers is not None:
+                fig = ct.chart.line(
+                    outliers,
+                    scatter_kwargs={
+                        'mode': 'markers',
+                        'name': names[i],
+                        'showlegend': False,
+                    },
+                    fig=fig
+                )
 
     return title, fig
 
 
 
-widgets_layout = ct.Layout(rows=5)
+widgets_layout = ct.Layout(rows=6)
 widgets_layout.add_widget(row=0, content='output-0')
 widgets_layout.add_widget(row=1, content='output-1')
 widgets_layout.add_widget(row=2, content='time')
 widgets_layout.add_widget(row=3, content='scenario')
 widgets_layout.add_widget(row=4, content='gcm_model')
+widgets_layout.add_widget(row=5, content='level')
 
 layout = ct.Layout(rows=1)
 layout.add_widget(row=0, content=widgets_layout, xs=4, sm=3, md=3, lg=2)
@@ -235,7 +300,7 @@ layout.add_widget(row=0, content='[child]')
 @ct.application(layout=layout)
 
 @ct.input.slider(
-    'time', min = 2006, max = 2098, step = 1,
+    'time', min = FIRST_YEAR, max = LAST_YEAR, step = 1,
     default=[2041,2045],
     label='Time range',
     description= 'Select the start and top year of the period of interest.',
@@ -245,46 +310,49 @@ layout.add_widget(row=0, content='[child]')
     'scenario', values=RCPS, label='Scenario'
 )
 @ct.input.dropdown('gcm_model', default=GCM_MODELS[-1]['value'], values=GCM_MODELS, label='GCM Model')
+@ct.input.dropdown('level', default=3, values=rollup.LEVELS, label='Regions')
 
 @ct.output.markdown()  # Description
 @ct.output.markdown()  # Heading
 @ct.output.livemap(click_on_feature=fwi_future_child, height=75)
 
 
-def application(time, scenario,gcm_model):
+@traced
+def application(time, scenario,gcm_model, level=3):
 
     if gcm_model not in AVAILABLE_MODELS[scenario]:
         print('The model '+gcm_model+' is not available for '+scenario)
     
         
-    data = ct.catalogue.retrieve(
-        'sis-tourism-fire-danger-indicators',
-        {
-            'time_aggregation': 'daily_indicators',
-            'product_type': 'single_model',
-            'variable': 'daily_fire_weather_index',
-            'gcm_model': gcm_model,
-            'experiment': scenario,
-            'period': [str(year) for year in range(time[0],time[1]+1)]
-        }
-    )
-    
-    
-    # Make the data plotable
-    data = ct.geo.make_regular(data, xref='rlon', yref='rlat',
-                               drop_encoding=['rlon', 'rlat'])
-    data = ct.cdm.standardise_time(data)
-    
-    # Define the clickable NUTS shapes
-    nuts = ct.shapes.catalogue.nuts(level=3)
-
-    # Average the retrieved data over the defined shapes
-    nuts_avg = ct.shapes.average(data, nuts)
+    nuts = ct.shapes.catalogue.nuts(level=level)
+    series = None
+    if hasattr(nuts, 'geometry'):
+        # Yearly totals are stored as prefix sums, so the map mean over any
+        # slider range only needs the years that were never computed before
+        name = f'daily_fire_weather_index-{gcm_model}-{scenario}'
+        store = get_store(name, FIRST_YEAR, LAST_YEAR)
+        fetch_daily_years(store.missing(time[0], time[1]), scenario, gcm_model, store)
+        store.fill(time[0], time[1],
+                   lambda year: get_yearly_nuts_totals(year, scenario, gcm_model))
+        # Clicks read the daily series of every region from a region-major
+        # store, filled from the cached yearly partitions on the first click
+        series = get_series(name, FIRST_YEAR, LAST_YEAR).handle()
+        # Higher levels are rolled up from the NUTS 3 means
+        nuts_avg = rollup.rollup(store.mean(time[0], time[1]), level)
+        # Region names for the hover labels
+        nuts_avg = zonal.with_names(nuts_avg, nuts)
+    else:
+        # The stores need local cubes and shapes, so on the toolbox the map
+        # is averaged from the cached daily partitions of the selected level
+        nuts_avg = ct.cube.average(
+            get_daily_nuts_data(time, scenario, gcm_model, level), dim='time',
+        )
     
     click_kwargs = dict(
         time=time,
         scenario=scenario,
-        daily_data=nuts_avg
+        gcm_model=gcm_model,
+        series=series,
     )
 
     add_overlay = True
@@ -304,7 +372,7 @@ def application(time, scenario,gcm_model):
             'data': nuts_avg,
             'type': 'layer',
             'checked': True,
-            'label': 'NUTS level 3',
+            'label': label_from_value(rollup.LEVELS, level, lower=False),
         }
     ]
     data_layers += layers
@@ -328,14 +396,15 @@ def application(time, scenario,gcm_model):
         }
         data_layers.append(nuts_overlay)
 
-    missing_regions = ct.shapes.catalogue.nuts(level=3, resolution='high', nuts_id=NO_DATA_REGIONS)
-    data_layers.append(
-        {
-            'data': ct.shapes.get_geojson(missing_regions),
-            'style': {'fillOpacity': 0, 'opacity': 0},
-            'label_template': '%{NUTS_NAME} (No data)',
-        }
-    )
+    if level == 3:
+        missing_regions = ct.shapes.catalogue.nuts(level=3, resolution='high', nuts_id=NO_DATA_REGIONS)
+        data_layers.append(
+            {
+                'data': ct.shapes.get_geojson(missing_regions),
+                'style': {'fillOpacity': 0, 'opacity': 0},
+                'label_template': '%{NUTS_NAME} (No data)',
+            }
+        )
 
     fig = ct.livemap.plot(
         data_layers,
@@ -349,70 +418,315 @@ def application(time, scenario,gcm_model):
     return DESCRIPTION, HEADING_1, fig
 
 
-def get_single_model_seasonal_fwi_data(time, scenario,time_list=None):
-    models_data=[]
+def get_daily_nuts_data(time, scenario, gcm_model, level=3):
+    # Each year is a cached partition, so widening the slider only
+    # processes the years that are new. NUTS 3 partitions keep the keys
+    # the map stores them under
+    args = (scenario, gcm_model) if level == 3 else (scenario, gcm_model, level)
+    years = list(range(time[0], time[1]+1))
+    partitions = ordered_map(
+        lambda year: get_daily_nuts_year(year, *args), years,
+    )
+    return concat_years(partitions)
 
-    if time=='1981_2005':
-        scenario='historical'
+
+@memoize
+def get_daily_nuts_year(year, scenario, gcm_model, level=3):
+    data = retrieve(
+        DATASET, {**get_daily_request(scenario, gcm_model), 'period': str(year)}
+    )
+    return reduce_daily_year(data, level)
+
+
+def reduce_daily_year(data, level=3):
+    data = ct.cdm.standardise_time(data)
     
-    if time_list is not None:
-        requestTime = time_list
-    else:
-        requestTime = time
-        
-    for model in AVAILABLE_MODELS[scenario]:
-        data = ct.catalogue.retrieve(
-            'sis-tourism-fire-danger-indicators',
-            {
-                'time_aggregation': 'seasonal_indicators',
-                'product_type': 'single_model',
-                'variable': 'seasonal_fire_weather_index',
-                'gcm_model': model,
-                'experiment': scenario,
-                'period': requestTime,
-            }
+    # Define the clickable NUTS shapes
+    nuts = ct.shapes.catalogue.nuts(level=level)
+
+    # Average the retrieved data over the shapes on its native rotated grid
+    nuts_avg = zonal.rotated_average(data, nuts)
+    return nuts_avg
+
+
+def get_zoom_window(time, zoom):
+    if zoom is None:
+        return time
+    start, stop = max(time[0], zoom[0]), min(time[1], zoom[1])
+    if start > stop:
+        return time
+    return [start, stop]
+
+
+def get_daily_series(time, scenario, gcm_model, nuts_id, series=None):
+    if series is not None:
+        store = from_handle(series)
+        store.fill(time[0], time[1],
+                   lambda year: get_daily_nuts_year(year, scenario, gcm_model))
+        data = store.read(nuts_id, time[0], time[1])
+        if data is not None:
+            return data
+    return get_daily_region_data(time, scenario, gcm_model, nuts_id)
+
+
+def get_daily_region_data(time, scenario, gcm_model, nuts_id):
+    level = rollup.level_of(nuts_id)
+    if zonal.bounds(ct.shapes.catalogue.nuts(level=level, nuts_id=[nuts_id])) is None:
+        # Toolbox shapes have no local geometry to crop to, so the whole
+        # domain is averaged over the regions of the clicked level
+        daily_data = get_daily_nuts_data(time, scenario, gcm_model, level)
+        return ct.cube.select(daily_data, nuts=nuts_id)
+
+    bounds = zonal.bounds(get_region_shapes(nuts_id))
+    fetch_daily_region_years(time, scenario, gcm_model, nuts_id, bounds)
+    years = list(range(time[0], time[1]+1))
+    partitions = ordered_map(
+        lambda year: get_daily_region_year(year, scenario, gcm_model, nuts_id),
+        years,
+    )
+    return concat_years(partitions)
+
+
+@memoize
+def get_daily_region_year(year, scenario, gcm_model, nuts_id):
+    nuts = get_region_shapes(nuts_id)
+    bounds = zonal.bounds(nuts)
+    # Only the cells around the region are retrieved and averaged
+    data = retrieve(DATASET, get_daily_region_request(scenario, gcm_model, bounds, year))
+    data = grid.crop_rotated(data, bounds)
+    data = ct.cdm.standardise_time(data)
+    nuts_avg = zonal.rotated_average(data, nuts)
+    nuts_avg = rollup.rollup(nuts_avg, rollup.level_of(nuts_id))
+    return ct.cube.select(nuts_avg, nuts=nuts_id)
+
+
+def get_region_shapes(nuts_id):
+    # Regions of any level are averaged from their NUTS 3 children
+    if rollup.level_of(nuts_id) == 3:
+        return ct.shapes.catalogue.nuts(level=3, nuts_id=[nuts_id])
+    nuts = ct.shapes.catalogue.nuts(level=3)
+    return ct.shapes.catalogue.nuts(
+        level=3, nuts_id=rollup.children(nuts_id, nuts['NUTS_ID']),
+    )
+
+
+def concat_years(partitions):
+    if len(partitions) == 1:
+        return partitions[0]
+    return ct.cube.concat(partitions, dim='time')
+
+
+def get_daily_request(scenario, gcm_model):
+    return {
+        'time_aggregation': 'daily_indicators',
+        'product_type': 'single_model',
+        'variable': 'daily_fire_weather_index',
+        'gcm_model': gcm_model,
+        'experiment': scenario,
+    }
+
+
+def get_daily_region_request(scenario, gcm_model, bounds, year=None):
+    request = {
+        **get_daily_request(scenario, gcm_model),
+        'area': grid.to_area(bounds),
+    }
+    if year is not None:
+        request['period'] = str(year)
+    return request
+
+
+def fetch_daily_years(years, scenario, gcm_model, store):
+    # Years never averaged before are fetched in a few multi-year requests.
+    # Each batch is reduced, cached as yearly partitions and added to the
+    # store before the next one is fetched, so only one batch of daily
+    # fields is held at a time and none has to survive in the retrieval cache
+    if not years:
+        return None
+    plan = planner.plan(
+        DATASET, get_daily_request(scenario, gcm_model),
+        [str(year) for year in years], min(years), max(years),
+        cached=lambda year: get_daily_nuts_year.cached(
+            int(year), scenario, gcm_model),
+        batch_size=DAILY_BATCH_SIZE,
+    )
+    for batch in plan.batches:
+        partitions = {}
+
+        def reduce(chunk, data):
+            year = int(chunk)
+            partitions[year] = reduce_daily_year(data)
+            get_daily_nuts_year.store(partitions[year], year, scenario, gcm_model)
+
+        planner.fetch(plan, batches=[batch], reduce=reduce)
+
+        def partition(year):
+            if year in partitions:
+                return partitions[year]
+            return get_daily_nuts_year(year, scenario, gcm_model)
+
+        first, last = int(batch[0]), int(batch[-1])
+        store.fill(first, last, lambda year: totals(partition(year)))
+    return plan
+
+
+def fetch_daily_region_years(time, scenario, gcm_model, nuts_id, bounds):
+    # A cropped region is small, so its new years come in one request
+    plan = planner.plan(
+        DATASET, get_daily_region_request(scenario, gcm_model, bounds),
+        [str(year) for year in range(time[0], time[1]+1)], time[0], time[1],
+        cached=lambda year: get_daily_region_year.cached(
+            int(year), scenario, gcm_model, nuts_id),
+    )
+    return planner.fetch(plan)
+
+
+def get_yearly_nuts_totals(year, scenario, gcm_model):
+    data = get_daily_nuts_year(year, scenario, gcm_model)
+    return totals(data)
+
+
+@traced
+def get_single_model_seasonal_fwi_data(time, scenario, nuts_id=None, selectors=None):
+    start, stop = get_period_bounds(time)
+    if stop <= HISTORICAL_PERIOD[1]:
+        scenario='historical'
+    models = AVAILABLE_MODELS[scenario]
+    if nuts_id is not None:
+        regions = [nuts_id] if isinstance(nuts_id, str) else list(nuts_id)
+    if not hasattr(ct.shapes.catalogue.nuts(level=3), 'geometry'):
+        # The aggregates need local cubes and shapes, so on the toolbox each
+        # model is averaged over the range at the level of the region
+        level = 3 if nuts_id is None else rollup.level_of(regions[0])
+        models_data = ordered_map(
+            lambda model: get_model_seasonal_means(model, scenario, start, stop, level),
+            models,
         )
-        data = ct.geo.make_regular(data, xref='rlon', yref='rlat',
-                                drop_encoding=['rlon', 'rlat'])
-        data = ct.cdm.standardise_time(data)
-        if time_list is not None:
-            start_time=str(time[0])+'-01-01'
-            stop_time=str(time[1])+'-12-31'
-            data = ct.cube.select(data, start_time=start_time, stop_time=stop_time)
-            
-        data = ct.cube.average(data, dim='time')
-        models_data.append(data)
-    models_data=ct.cube.concat(models_data,dim='gcm_model')
+        models_data = ct.cube.concat(models_data, dim='gcm_model')
+        if nuts_id is not None:
+            models_data = ct.cube.select(models_data, nuts=nuts_id)
+        if selectors:
+            models_data = ct.cube.select(models_data, **selectors)
+        return models_data
+
+    # Chunks with neither aggregates nor data cached are fetched in one
+    # request per model
+    plans = ordered_map(
+        lambda model: fetch_seasonal_chunks(model, scenario, start, stop),
+        models,
+    )
+    periods = plans[0].chunks
+
+    # Every (model, chunk) is reduced once to mergeable per-year aggregates,
+    # ordered_map keeps the results in request order
+    requests = [(model, period) for model in models for period in periods]
+    chunk_stats = ordered_map(
+        lambda request: get_model_chunk_stats(request[0], scenario, request[1]),
+        requests,
+    )
+    if nuts_id is not None:
+        # Regions above NUTS 3 keep their children, rolled up below
+        ids = [i for region in regions for i in rollup.children(region, chunk_stats[0].ids)]
+        chunk_stats = [s.select(ids) for s in chunk_stats]
+    models_data = []
+    for i, model in enumerate(models):
+        stats = chunk_stats[i * len(periods):(i + 1) * len(periods)]
+        aggregates = [s.over(start, stop) for s in stats]
+        models_data.append(merge_all(a for a in aggregates if a is not None))
+    models_data = to_cube(models_data, chunk_stats[0].ids, 'gcm_model', models,
+                          areas=chunk_stats[0].areas)
+    if nuts_id is not None:
+        models_data = rollup.rollup(models_data, rollup.level_of(regions[0]))
+        models_data = ct.cube.select(models_data, nuts=nuts_id)
+    if selectors:
+        models_data = ct.cube.select(models_data, **selectors)
     return models_data
 
 
-def get_comparison_data(time, scenario, compare):
+@memoize
+@bounded
+def get_model_chunk_stats(model, scenario, period):
+    data = retrieve(
+        DATASET, {**get_seasonal_request(model, scenario), 'period': period}
+    )
+    data = ct.cdm.standardise_time(data)
+    nuts = ct.shapes.catalogue.nuts(level=3)
+    nuts_avg = zonal.rotated_average(data, nuts)
+    return ChunkStats.from_cube(nuts_avg)
+
+
+@memoize
+@bounded
+def get_model_seasonal_means(model, scenario, start, stop, level=3):
+    if scenario == 'historical':
+        periods = ['_'.join(str(year) for year in HISTORICAL_PERIOD)]
+    else:
+        periods = planner.overlapping(POSSIBLE_PERIODS, start, stop)
+    data = retrieve(
+        DATASET, {**get_seasonal_request(model, scenario), 'period': periods}
+    )
+    data = ct.cdm.standardise_time(data)
+    data = ct.cube.select(
+        data, start_time=f'{start}-01-01', stop_time=f'{stop}-12-31',
+    )
+    data = ct.cube.average(data, dim='time')
+    nuts = ct.shapes.catalogue.nuts(level=level)
+    return zonal.rotated_average(data, nuts)
+
+
+def get_period_bounds(time):
+    # Slider ranges are [start, stop], periods 'start_stop' or lists of them
+    if not isinstance(time, str) and isinstance(time[0], int):
+        return time[0], time[1]
+    if isinstance(time, str):
+        time = [time]
+    return int(time[0].split('_')[0]), int(time[-1].split('_')[-1])
+
+
+def get_seasonal_request(model, scenario):
+    return {
+        'time_aggregation': 'seasonal_indicators',
+        'product_type': 'single_model',
+        'variable': 'seasonal_fire_weather_index',
+        'gcm_model': model,
+        'experiment': scenario,
+    }
+
+
+def fetch_seasonal_chunks(model, scenario, start, stop):
+    if scenario == 'historical':
+        chunks = ['_'.join(str(year) for year in HISTORICAL_PERIOD)]
+    else:
+        chunks = POSSIBLE_PERIODS
+    plan = planner.plan(
+        DATASET, get_seasonal_request(model, scenario), chunks, start, stop,
+        cached=lambda period: get_model_chunk_stats.cached(model, scenario, period),
+    )
+    return planner.fetch(plan)
+
+
+@traced
+def get_comparison_data(time, scenario, compare, nuts_id=None, selectors=None):
 
     comparison_data=[]
-    nuts = ct.shapes.catalogue.nuts(level=3)
     if compare == 'horizons':
-        for time in TIMES:
-            time = time['value']
-            data = get_single_model_seasonal_fwi_data(time, scenario)
-            nuts_avg = ct.shapes.average(data, nuts)
-            comparison_data.append(nuts_avg)
+        comparison_data = ordered_map(
+            lambda t: get_single_model_seasonal_fwi_data(
+                t['value'], scenario, nuts_id, selectors),
+            TIMES,
+        )
     
     elif compare == 'rcps':
-        time_list=[]
-        for possible_period in POSSIBLE_PERIODS:
-            possible_period_years=[int(year) for year in possible_period.split('_')]
-            if possible_period_years[0] in range(time[0],time[1]+1) or possible_period_years[1] in range(time[0],time[1]+1):
-                time_list.append(possible_period)
-        for scenario in RCPS:
-            scenario = scenario['value']
-            data = get_single_model_seasonal_fwi_data(time, scenario, time_list)
-            nuts_avg = ct.shapes.average(data, nuts)
-            comparison_data.append(nuts_avg)
+        comparison_data = ordered_map(
+            lambda s: get_single_model_seasonal_fwi_data(
+                time, s['value'], nuts_id, selectors),
+            RCPS,
+        )
 
     return comparison_data
 
 
-def label_from_value(list_of_dicts, value):
+def label_from_value(list_of_dicts, value, lower=True):
     if list_of_dicts is None:
         return(str(value[0])+'-'+str(value[1]))
     for i in range(len(list_of_dicts)):
@@ -421,7 +735,8 @@ def label_from_value(list_of_dicts, value):
                 label = list_of_dicts[i]['text_name']
             except KeyError:
                 label = list_of_dicts[i]['label']
-                label = label[0].lower() + label[1:]
+                if lower:
+                    label = label[0].lower() + label[1:]
             break
     else:
         label = None
@@ -0,0 +1,5 @@
+"""Helpers shared by the fire risk toolbox scripts.
+
+The scripts in ``final``, ``simple features`` and ``tests`` import from this
+package, so the repository root has to be on the Python path when they run.
+"""
@@ -0,0 +1,135 @@
+"""Mergeable summary statistics of regional values.
+
+An ``Aggregate`` holds count, sum, sum of squares, minimum and maximum
+arrays. Two aggregates merge element-wise without going back to the values,
+so statistics over any union of years or chunks come from cached pieces.
+``ChunkStats`` keeps one aggregate per year and region for a catalogue chunk.
+"""
+import numpy as np
+
+
+class Aggregate:
+
+    def __init__(self, count, total, total_sq, minimum, maximum):
+        self.count = count
+        self.total = total
+        self.total_sq = total_sq
+        self.minimum = minimum
+        self.maximum = maximum
+
+    @classmethod
+    def of(cls, values, axis=0):
+        """Reduce ``values`` along ``axis``, ignoring NaNs."""
+        values = np.asarray(values, dtype='float64')
+        valid = np.isfinite(values)
+        zeroed = np.where(valid, values, 0.0)
+        return cls(
+            valid.sum(axis=axis),
+            zeroed.sum(axis=axis),
+            (zeroed ** 2).sum(axis=axis),
+            np.where(valid, values, np.inf).min(axis=axis, initial=np.inf),
+            np.where(valid, values, -np.inf).max(axis=axis, initial=-np.inf),
+        )
+
+    def merge(self, other):
+        return Aggregate(
+            self.count + other.count,
+            self.total + other.total,
+            self.total_sq + other.total_sq,
+            np.fmin(self.minimum, other.minimum),
+            np.fmax(self.maximum, other.maximum),
+        )
+
+    def reduce(self, axis=0):
+        """Merge along ``axis``."""
+        return Aggregate(
+            self.count.sum(axis=axis),
+            self.total.sum(axis=axis),
+            self.total_sq.sum(axis=axis),
+            np.fmin.reduce(self.minimum, axis=axis),
+            np.fmax.reduce(self.maximum, axis=axis),
+        )
+
+    def take(self, index, axis=0):
+        return Aggregate(*(
+            np.take(a, index, axis=axis)
+            for a in (self.count, self.total, self.total_sq, self.minimum, self.maximum)
+        ))
+
+    @property
+    def mean(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.count > 0, self.total / self.count, np.nan)
+
+    @property
+    def variance(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = self.total / self.count
+            variance = self.total_sq / self.count - mean ** 2
+        return np.where(self.count > 0, np.maximum(variance, 0.0), np.nan)
+
+    @property
+    def std(self):
+        return np.sqrt(self.variance)
+
+    def statistic(self, name):
+        if name in ('min', 'max'):
+            values = self.minimum if name == 'min' else self.maximum
+            return np.where(self.count > 0, values, np.nan)
+        return getattr(self, name)
+
+
+def merge_all(aggregates):
+    aggregates = list(aggregates)
+    merged = aggregates[0]
+    for aggregate in aggregates[1:]:
+        merged = merged.merge(aggregate)
+    return merged
+
+
+class ChunkStats:
+    """Per-year aggregates of one catalogue chunk, one column per region."""
+
+    def __init__(self, years, ids, aggregate, areas=None):
+        self.years = np.asarray(years)
+        self.ids = list(ids)
+        self.aggregate = aggregate
+        self.areas = None if areas is None else np.asarray(areas)
+
+    @classmethod
+    def from_cube(cls, data):
+        """Reduce a (time, nuts) cube to one aggregate per year and region."""
+        data = data.transpose('time', 'nuts')
+        years = data['time'].dt.year.values
+        values = data.values
+        unique = np.unique(years)
+        yearly = [Aggregate.of(values[years == year]) for year in unique]
+        areas = data['area'].values if 'area' in data.coords else None
+        return cls(unique, data['nuts'].values.tolist(), Aggregate(*(
+            np.stack([getattr(a, field) for a in yearly])
+            for field in ('count', 'total', 'total_sq', 'minimum', 'maximum')
+        )), areas)
+
+    def select(self, ids):
+        """Keep the regions in ``ids``, in that order."""
+        index = [self.ids.index(i) for i in ids]
+        areas = None if self.areas is None else self.areas[index]
+        return ChunkStats(self.years, ids, self.aggregate.take(index, axis=1), areas)
+
+    def over(self, start, stop):
+        """Aggregate over the years of ``start..stop`` held by this chunk."""
+        index = np.nonzero((self.years >= start) & (self.years <= stop))[0]
+        if not index.size:
+            return None
+        return self.aggregate.take(index).reduce()
+
+
+def to_cube(aggregates, ids, dim, labels, statistic='mean', areas=None):
+    """Stack one statistic of per-label aggregates into a (dim, nuts) cube."""
+    import xarray as xr
+
+    values = np.stack([a.statistic(statistic) for a in aggregates])
+    coords = {dim: list(labels), 'nuts': list(ids)}
+    if areas is not None:
+        coords['area'] = ('nuts', areas)
+    return xr.DataArray(values, dims=(dim, 'nuts'), coords=coords)
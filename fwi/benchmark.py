@@ -0,0 +1,233 @@
+"""Offline benchmarks of the fire risk pipeline on synthetic data.
+
+Each stage (retrieval decode, make_regular, standardise_time, time average,
+NUTS zonal average on the regular and rotated grids, regional order
+statistics, chart and live map payloads) and each end-to-end path of the
+scripts is timed with peak traced memory, and the results are written as
+JSON so runs can be compared::
+
+    python -m fwi.benchmark --stride 2 --repeat 3 --output benchmark.json
+
+End-to-end paths run cold (all caches cleared before each repeat) and warm.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FINAL_PRODUCT = os.path.join(ROOT, 'final', 'FinalProduct.py')
+FIRE_RISK = os.path.join(ROOT, 'simple features', 'fire_risk.py')
+
+DAILY_REQUEST = {
+    'time_aggregation': 'daily_indicators',
+    'product_type': 'single_model',
+    'variable': 'daily_fire_weather_index',
+    'gcm_model': 'noresm1_m',
+    'experiment': 'rcp8_5',
+    'period': '2041',
+}
+
+PARAMS = {'properties': {'NUTS_ID': 'AO123', 'NUTS_NAME': 'Region AO123', 'value': 1}}
+
+
+def measure(func, repeat=3, setup=None):
+    """Wall time of ``func`` over ``repeat`` runs and its peak traced memory."""
+    seconds, peaks = [], []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        gc.collect()
+        tracemalloc.start()
+        start = time.perf_counter()
+        func()
+        seconds.append(time.perf_counter() - start)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return {
+        'seconds': seconds,
+        'median': statistics.median(seconds),
+        'min': min(seconds),
+        'peak_bytes': max(peaks),
+    }
+
+
+def use_cache_dir(directory):
+    from fwi import cache, climatology, labels, remap, series, yearly, zonal
+
+    cache.RETRIEVAL_CACHE.directory = os.path.join(directory, 'retrieve')
+    cache.RESULT_CACHE.directory = os.path.join(directory, 'results')
+    zonal.ZONAL_DIR = os.path.join(directory, 'zonal')
+    remap.REMAP_DIR = os.path.join(directory, 'remap')
+    labels.LABELS_DIR = os.path.join(directory, 'labels')
+    yearly.YEARLY_DIR = os.path.join(directory, 'yearly')
+    series.SERIES_DIR = os.path.join(directory, 'series')
+    climatology.CLIMATOLOGY_DIR = os.path.join(directory, 'climatology')
+
+
+def clear_caches():
+    import shutil
+
+    from fwi import cache, climatology, labels, remap, series, yearly, zonal
+
+    cache.RETRIEVAL_CACHE.clear()
+    cache.RESULT_CACHE.clear()
+    zonal._weights.clear()
+    shutil.rmtree(zonal.ZONAL_DIR, ignore_errors=True)
+    shutil.rmtree(remap.REMAP_DIR, ignore_errors=True)
+    labels._labels.clear()
+    shutil.rmtree(labels.LABELS_DIR, ignore_errors=True)
+    yearly._stores.clear()
+    shutil.rmtree(yearly.YEARLY_DIR, ignore_errors=True)
+    series._stores.clear()
+    shutil.rmtree(series.SERIES_DIR, ignore_errors=True)
+    climatology._loaded.clear()
+    shutil.rmtree(climatology.CLIMATOLOGY_DIR, ignore_errors=True)
+
+
+def stage_benchmarks(workdir):
+    """Pipeline stages on one year of daily data, keyed by stage name."""
+    import cdstoolbox as ct
+    import xarray as xr
+
+    from fwi import labels, zonal
+
+    raw = ct.catalogue.retrieve('sis-tourism-fire-danger-indicators', DAILY_REQUEST)
+    path = os.path.join(workdir, 'daily.nc')
+    raw.to_netcdf(path)
+    regular = ct.geo.make_regular(raw, xref='rlon', yref='rlat',
+                                  drop_encoding=['rlon', 'rlat'])
+    standard = ct.cdm.standardise_time(regular)
+    nuts = ct.shapes.catalogue.nuts(level=3)
+    nuts_avg = zonal.average(standard, nuts)
+    region = ct.cube.select(nuts_avg, nuts=PARAMS['properties']['NUTS_ID'])
+
+    def livemap_payload():
+        ct.livemap.plot([
+            {'data': nuts_avg, 'type': 'layer'},
+            {'data': nuts_avg, 'click_kwargs': {'daily_data': nuts_avg}},
+        ])
+
+    def chart_payload():
+        ct.chart.line(region, scatter_kwargs={'name': 'region'})
+        ct.chart.box(region, box_kwargs={'mean': [ct.cube.average(region)]})
+
+    def clear_weights():
+        zonal._weights.clear()
+        clear_caches()
+
+    return {
+        'retrieval_decode': (lambda: xr.open_dataarray(path).load(), None),
+        'make_regular': (
+            lambda: ct.geo.make_regular(raw, xref='rlon', yref='rlat',
+                                        drop_encoding=['rlon', 'rlat']),
+            None,
+        ),
+        'standardise_time': (lambda: ct.cdm.standardise_time(regular), None),
+        'time_average': (lambda: ct.cube.average(standard, dim='time'), None),
+        'zonal_average_cold': (lambda: zonal.average(standard, nuts), clear_weights),
+        'zonal_average_warm': (lambda: zonal.average(standard, nuts), None),
+        'zonal_average_rotated': (lambda: zonal.rotated_average(raw, nuts), None),
+        'zonal_statistics': (
+            lambda: labels.zonal_statistics(raw, nuts, ['min', 'median', 'p90', 'max']),
+            None,
+        ),
+        'livemap_payload': (livemap_payload, None),
+        'chart_payload': (chart_payload, None),
+    }
+
+
+def end_to_end_benchmarks():
+    """End-to-end calls of the scripts, keyed by path name."""
+    from fwi import toolbox
+
+    final = toolbox.load_app(FINAL_PRODUCT)
+    fire_risk = toolbox.load_app(FIRE_RISK)
+    return {
+        'application_1_year': lambda: final.application([2041, 2041], 'rcp8_5', 'noresm1_m'),
+        'application_20_years': lambda: final.application([2041, 2060], 'rcp8_5', 'noresm1_m'),
+        'intermediate_horizons': lambda: final.intermediate('2041_2060', 'rcp8_5', 'horizons'),
+        'intermediate_rcps': lambda: final.intermediate([2041, 2060], 'rcp8_5', 'rcps'),
+        'get_child_data_models': lambda: fire_risk.get_child_data('2021_2040', 'rcp8_5', 'mean', 'models'),
+    }
+
+
+def run(stride=2, repeat=3, latency=0.0, only=None):
+    from fwi import synthetic
+
+    synthetic.install(stride=stride, latency=latency)
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        use_cache_dir(os.path.join(workdir, 'cache'))
+
+        for name, (func, setup) in stage_benchmarks(workdir).items():
+            if only and only not in name:
+                continue
+            print(f'stage {name}', file=sys.stderr)
+            results.append({'name': name, 'group': 'stage', **measure(func, repeat, setup)})
+
+        for name, func in end_to_end_benchmarks().items():
+            if only and only not in name:
+                continue
+            print(f'end-to-end {name}', file=sys.stderr)
+            results.append({
+                'name': name, 'group': 'end_to_end', 'cache': 'cold',
+                **measure(func, repeat, clear_caches),
+            })
+            results.append({
+                'name': name, 'group': 'end_to_end', 'cache': 'warm',
+                **measure(func, repeat),
+            })
+
+    import numpy
+    import xarray
+
+    from fwi import cache
+
+    return {
+        'meta': {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'stride': stride,
+            'repeat': repeat,
+            'latency': latency,
+            'python': platform.python_version(),
+            'numpy': numpy.__version__,
+            'xarray': xarray.__version__,
+            'machine': platform.machine(),
+        },
+        'results': results,
+        'caches': {
+            'retrieve': cache.RETRIEVAL_CACHE.stats(),
+            'results': cache.RESULT_CACHE.stats(),
+        },
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--stride', type=int, default=2,
+                        help='subsampling of the synthetic grids (1 is full size)')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='injected delay per catalogue request in seconds')
+    parser.add_argument('--only', help='run benchmarks whose name contains this')
+    parser.add_argument('--output', default='benchmark.json')
+    args = parser.parse_args(argv)
+
+    report = run(args.stride, args.repeat, args.latency, args.only)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    for result in report['results']:
+        label = result['name'] + (f" ({result['cache']})" if 'cache' in result else '')
+        print(f"{label:40s} {result['median']:9.3f} s {result['peak_bytes'] / 2 ** 20:9.1f} MiB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,302 @@
+"""Persistent on-disk caches for catalogue retrievals and derived results.
+
+Requests are normalised (sorted keys, sorted list values except for
+``area``-like fields, one-item lists as their item, lower-cased experiment)
+and hashed, so two requests that only differ in ordering share a
+single entry. Entries are pickled under ``FWI_CACHE_DIR`` and evicted least
+recently used first once the cache grows past ``FWI_CACHE_SIZE`` bytes.
+
+``memoize`` applies the same store to whole functions, keyed on their
+arguments and ``RESULT_VERSION``, for results such as the child service
+comparison summaries.
+
+Misses are single-flight: while one thread computes an entry, other threads
+asking for the same key wait for its result instead of repeating the
+retrieval. ``stats()`` counts these as ``coalesced``.
+"""
+import functools
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import threading
+from concurrent.futures import Future
+
+from fwi import tracing
+
+CACHE_DIR = os.environ.get(
+    'FWI_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'fwi')
+)
+CACHE_SIZE = int(os.environ.get('FWI_CACHE_SIZE', 10 * 1024 ** 3))
+
+MISSING = object()
+
+
+# Bump when a memoized function changes what it returns, so results stored
+# by older code are not read back (2: ``intermediate`` returns box summaries,
+# 3: chunk minima and maxima ignore missing values)
+RESULT_VERSION = 3
+
+# List fields whose order is meaningful (a bounding box, a grid step)
+ORDERED_FIELDS = {'area', 'grid'}
+
+
+def normalise_request(dataset, request):
+    normalised = {}
+    for key in sorted(request):
+        value = request[key]
+        if isinstance(value, (list, tuple)) and len(value) == 1 and key not in ORDERED_FIELDS:
+            # A one-item list asks the catalogue for the same data as the item
+            value = value[0]
+        if isinstance(value, (list, tuple)):
+            value = [str(v) for v in value]
+            if key not in ORDERED_FIELDS:
+                value = sorted(value)
+            if key == 'experiment':
+                value = [v.lower() for v in value]
+        else:
+            value = str(value)
+            if key == 'experiment':
+                value = value.lower()
+        normalised[key] = value
+    return {'dataset': dataset, 'request': normalised}
+
+
+def request_key(dataset, request):
+    normalised = normalise_request(dataset, request)
+    payload = json.dumps(normalised, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class SingleFlight:
+    """One call per key at a time, its result shared with concurrent callers.
+
+    ``do`` returns the value and whether it came from another caller's call.
+    """
+
+    def __init__(self):
+        self.executed = 0
+        self.coalesced = 0
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+                self.executed += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            return future.result(), True
+        try:
+            value = func()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(value)
+            return value, False
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'executed': self.executed,
+                'coalesced': self.coalesced,
+                'in_flight': len(self._calls),
+            }
+
+
+class DiskCache:
+    """Size-bounded LRU store of pickled values keyed by hex digests."""
+
+    def __init__(self, directory, max_bytes=CACHE_SIZE):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.flights = SingleFlight()
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.pkl')
+
+    def _read(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return MISSING
+        # Bump the modification time so eviction sees this entry as recent
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return value
+
+    def __contains__(self, key):
+        return os.path.exists(self._path(key))
+
+    def get(self, key):
+        value = self._read(key)
+        with self._lock:
+            if value is MISSING:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def put(self, key, value):
+        if hasattr(value, 'load'):
+            value = value.load()
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._path(key))
+        except (pickle.PicklingError, TypeError, AttributeError):
+            # Values that cannot be pickled are simply not cached
+            os.remove(tmp_path)
+            return
+        self._evict()
+
+    def get_or_compute(self, key, compute):
+        value = self.get(key)
+        if value is not MISSING:
+            tracing.annotate(cache='hit')
+            return value
+
+        def fill():
+            # A flight that finished since the miss has already stored it
+            value = self._read(key)
+            if value is MISSING:
+                value = compute()
+                self.put(key, value)
+            return value
+
+        value, shared = self.flights.do(key, fill)
+        tracing.annotate(cache='coalesced' if shared else 'miss')
+        return value
+
+    def fill(self, key, compute, stored=()):
+        """Single-flight ``compute()`` for ``key``, counted as a miss.
+
+        For requests whose answer ``compute`` stores itself under the
+        ``stored`` keys, such as multi-chunk batches cached one chunk at a
+        time. It is skipped, as a hit, once all of them are in the cache.
+        Fills have their own flights, so a ``get_or_compute`` of the same key
+        never takes a fill's result as its value.
+        """
+        def run():
+            done = bool(stored) and all(k in self for k in stored)
+            with self._lock:
+                if done:
+                    self.hits += 1
+                else:
+                    self.misses += 1
+            return None if done else compute()
+
+        value, shared = self.flights.do(('fill', key), run)
+        tracing.annotate(cache='coalesced' if shared else 'miss')
+        return value
+
+    def _evict(self):
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.directory):
+                if not name.endswith('.pkl'):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, name))
+            total = sum(size for _, size, _ in entries)
+            for _, size, name in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    pass
+                total -= size
+                self.evictions += 1
+
+    def clear(self):
+        if not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            if name.endswith('.pkl'):
+                os.remove(os.path.join(self.directory, name))
+
+    def stats(self):
+        with self._lock:
+            stats = {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+        flights = self.flights.stats()
+        stats['coalesced'] = flights['coalesced']
+        stats['in_flight'] = flights['in_flight']
+        return stats
+
+
+RETRIEVAL_CACHE = DiskCache(os.path.join(CACHE_DIR, 'retrieve'))
+RESULT_CACHE = DiskCache(os.path.join(CACHE_DIR, 'results'))
+
+
+@tracing.traced
+def retrieve(dataset, request, cache=RETRIEVAL_CACHE):
+    """Cached drop-in for ``ct.catalogue.retrieve(dataset, request)``."""
+    import cdstoolbox as ct
+
+    key = request_key(dataset, request)
+    return cache.get_or_compute(
+        key, lambda: ct.catalogue.retrieve(dataset, request)
+    )
+
+
+def call_key(func, args, kwargs):
+    payload = json.dumps(
+        [RESULT_VERSION, func.__module__, func.__qualname__, args, kwargs],
+        sort_keys=True, separators=(',', ':'), default=str,
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def memoize(func=None, cache=RESULT_CACHE):
+    """Cache the results of ``func`` on disk, keyed on its arguments.
+
+    Each call opens its own span, so the hit or miss is recorded on it.
+    """
+    if func is None:
+        return functools.partial(memoize, cache=cache)
+
+    @tracing.traced
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        key = call_key(func, args, kwargs)
+        return cache.get_or_compute(key, lambda: func(*args, **kwargs))
+
+    def cached(*args, **kwargs):
+        """Whether the result for these arguments is already stored."""
+        return call_key(func, args, kwargs) in cache
+
+    def store(value, *args, **kwargs):
+        """Record ``value`` as the result for these arguments."""
+        cache.put(call_key(func, args, kwargs), value)
+
+    wrapper.cache = cache
+    wrapper.cached = cached
+    wrapper.store = store
+    return wrapper
@@ -0,0 +1,83 @@
+"""Versioned on-disk artefacts for climatologies that never change.
+
+A climatology such as the 1981-2005 reanalysis mean is fixed once its inputs
+(dataset version, period, months, extent) are. ``get`` computes it on first
+use and saves it under ``FWI_CACHE_DIR/climatology`` as
+``<name>-<digest>.pkl``, where the digest covers those inputs and
+``ARTEFACT_VERSION``. A JSON sidecar records the inputs. Artefacts are kept
+out of the LRU caches so they are never evicted, and loaded ones stay in
+memory for the life of the process.
+"""
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import threading
+
+import numpy as np
+
+from fwi import tracing, zonal
+from fwi.cache import CACHE_DIR
+
+
+CLIMATOLOGY_DIR = os.path.join(CACHE_DIR, 'climatology')
+
+# Bump when the way artefacts are computed changes
+ARTEFACT_VERSION = 2
+
+_loaded = {}
+_lock = threading.Lock()
+
+
+def artefact_name(name, **fields):
+    payload = json.dumps(
+        {'artefact_version': ARTEFACT_VERSION, 'name': name, **fields},
+        sort_keys=True, separators=(',', ':'), default=str,
+    )
+    digest = hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+    return f'{name}-{digest}'
+
+
+def _save(path, value, fields):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if hasattr(value, 'load'):
+        value = value.load()
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+    with open(os.path.splitext(path)[0] + '.json', 'w') as f:
+        json.dump(
+            {'artefact_version': ARTEFACT_VERSION, **fields}, f,
+            indent=1, sort_keys=True, default=str,
+        )
+
+
+def get(name, build, **fields):
+    """Artefact ``name`` for ``fields``, from memory, disk, else ``build()``."""
+    key = artefact_name(name, **fields)
+    with _lock:
+        if key in _loaded:
+            tracing.annotate(cache='hit')
+            return _loaded[key]
+    path = os.path.join(CLIMATOLOGY_DIR, key + '.pkl')
+    try:
+        with open(path, 'rb') as f:
+            value = pickle.load(f)
+        tracing.annotate(cache='hit')
+    except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+        tracing.annotate(cache='miss')
+        value = build()
+        _save(path, value, fields)
+    with _lock:
+        _loaded[key] = value
+    return value
+
+
+def regions_tag(nuts):
+    """Fingerprint of local NUTS regions, a fixed tag for toolbox shapes."""
+    if not hasattr(nuts, 'geometry'):
+        return 'toolbox'
+    ids = [str(nuts_id) for nuts_id in nuts['NUTS_ID']]
+    return zonal.regions_fingerprint(ids, np.asarray(nuts.geometry))
@@ -0,0 +1,76 @@
+"""Downsampling of long daily series for line charts.
+
+A 2006-2098 daily series has about 34,000 points per region, far more than
+a chart is wide. ``lttb`` keeps ``target`` points with the
+largest-triangle-three-buckets algorithm, which follows the visual shape of
+the line. A bucket whose highest value falls in a higher EFFIS danger class
+than the point LTTB picked also keeps that peak, so no threshold crossing
+disappears from the chart. ``downsample`` applies it to a 1-D cube with a
+target tied to the chart width in pixels.
+"""
+import numpy as np
+
+
+# Lower bounds of the EFFIS classes above "very low"
+EFFIS_THRESHOLDS = [5.2, 11.2, 21.3, 38.0, 50.0]
+
+# Width of the daily chart in pixels and points kept per pixel
+CHART_WIDTH = 800
+POINTS_PER_PIXEL = 1
+
+
+def danger_class(values):
+    return np.searchsorted(EFFIS_THRESHOLDS, values, side='right')
+
+
+def lttb(y, target, x=None, thresholds=EFFIS_THRESHOLDS):
+    """Sorted indices of the points of ``y`` to keep, about ``target`` of them."""
+    y = np.asarray(y, dtype='float64')
+    n = y.size
+    if target >= n or target < 3:
+        return np.arange(n)
+    x = np.arange(n, dtype='float64') if x is None else np.asarray(x, 'float64')
+    classes = np.searchsorted(thresholds, y, side='right')
+    # target - 2 buckets between the fixed first and last points
+    edges = np.linspace(1, n - 1, target - 1).astype('int64')
+    keep = [0]
+    previous = 0
+    for i in range(target - 2):
+        low, high = edges[i], edges[i + 1]
+        if high <= low:
+            continue
+        next_low = edges[i + 1]
+        next_high = edges[i + 2] if i + 2 < edges.size else n
+        next_x = x[next_low:next_high].mean()
+        next_y = y[next_low:next_high].mean()
+        area = np.abs(
+            (x[previous] - next_x) * (y[low:high] - y[previous])
+            - (x[previous] - x[low:high]) * (next_y - y[previous])
+        )
+        chosen = low + int(np.argmax(area))
+        keep.append(chosen)
+        peak = low + int(np.argmax(y[low:high]))
+        if classes[peak] > classes[chosen]:
+            keep.append(peak)
+        previous = chosen
+    keep.append(n - 1)
+    return np.unique(keep)
+
+
+def target_points(width=CHART_WIDTH):
+    return int(width * POINTS_PER_PIXEL)
+
+
+def downsample(data, width=CHART_WIDTH, dim='time'):
+    """``data`` reduced to about one point per pixel of a ``width`` chart.
+
+    Missing values are dropped first. Cubes that are not local 1-D xarray
+    objects are returned unchanged.
+    """
+    if not hasattr(data, 'dims') or data.dims != (dim,):
+        return data
+    valid = np.nonzero(np.isfinite(data.values))[0]
+    keep = valid[lttb(data.values[valid], target_points(width))]
+    if keep.size == data.sizes[dim]:
+        return data
+    return data.isel({dim: keep})
@@ -0,0 +1,122 @@
+"""Check that planned pipelines match their original order on synthetic data.
+
+Each case runs a ``fwi.pipeline.Pipeline`` as written and as planned, and
+compares the two results cell by cell::
+
+    python -m fwi.equivalence --stride 4
+
+The exit status is 1 if any case differs by more than the tolerances.
+"""
+import argparse
+import sys
+
+import numpy as np
+
+
+SEASONAL_REQUEST = {
+    'time_aggregation': 'seasonal_indicators',
+    'product_type': 'multi_model_mean_case',
+    'variable': 'seasonal_fire_weather_index',
+    'experiment': 'rcp8_5',
+    'period': '2041_2060',
+}
+
+DAILY_REQUEST = {
+    'time_aggregation': 'daily_indicators',
+    'product_type': 'single_model',
+    'variable': 'daily_fire_weather_index',
+    'gcm_model': 'noresm1_m',
+    'experiment': 'rcp8_5',
+    'period': '2041',
+}
+
+
+def cases():
+    """Pipelines of the scripts with their input cubes, keyed by name."""
+    import cdstoolbox as ct
+
+    from fwi import pipeline
+
+    dataset = 'sis-tourism-fire-danger-indicators'
+    seasonal = ct.catalogue.retrieve(dataset, SEASONAL_REQUEST)
+    daily = ct.catalogue.retrieve(dataset, DAILY_REQUEST)
+    historical = ct.catalogue.retrieve(
+        dataset, {**SEASONAL_REQUEST, 'experiment': 'historical', 'period': '1981_2005'},
+    )
+    climate = pipeline.Pipeline([pipeline.make_regular(), pipeline.time_mean()])(historical)
+    nuts = ct.shapes.catalogue.nuts(level=3)
+    return {
+        'seasonal_mean': (
+            pipeline.Pipeline([pipeline.make_regular(), pipeline.time_mean()]),
+            seasonal,
+        ),
+        'seasonal_anomaly': (
+            pipeline.Pipeline([
+                pipeline.make_regular(), pipeline.subtract(climate),
+                pipeline.time_mean(),
+            ]),
+            seasonal,
+        ),
+        'daily_nuts_mean': (
+            pipeline.Pipeline([
+                pipeline.make_regular(), pipeline.standardise_time(),
+                pipeline.time_mean(), pipeline.zonal_mean(nuts),
+            ]),
+            daily,
+        ),
+    }
+
+
+def compare(expected, actual, rtol, atol):
+    expected = np.asarray(expected, dtype='float64')
+    actual = np.asarray(actual, dtype='float64')
+    same_mask = bool((np.isnan(expected) == np.isnan(actual)).all())
+    valid = ~np.isnan(expected) & ~np.isnan(actual)
+    error = np.abs(expected - actual)[valid]
+    return {
+        'same_shape': expected.shape == actual.shape,
+        'same_mask': same_mask,
+        'max_abs': float(error.max()) if error.size else 0.0,
+        'ok': bool(
+            expected.shape == actual.shape and same_mask
+            and np.allclose(actual[valid], expected[valid], rtol=rtol, atol=atol)
+        ),
+    }
+
+
+def run(stride=4, rtol=1e-5, atol=1e-4):
+    from fwi import synthetic
+
+    synthetic.install(stride=stride)
+    results = {}
+    for name, (pipeline, data) in cases().items():
+        original = pipeline.run(data, planned=False)
+        planned = pipeline.plan()
+        results[name] = {
+            'original': pipeline.describe(),
+            'planned': planned.describe(),
+            **compare(original, planned.run(data, planned=False), rtol, atol),
+        }
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--stride', type=int, default=4,
+                        help='subsampling of the synthetic grids (1 is full size)')
+    parser.add_argument('--rtol', type=float, default=1e-5)
+    parser.add_argument('--atol', type=float, default=1e-4)
+    args = parser.parse_args(argv)
+
+    results = run(args.stride, args.rtol, args.atol)
+    for name, result in results.items():
+        status = 'ok' if result['ok'] else 'FAIL'
+        print(
+            f"{name:<20} {status:<5} max abs {result['max_abs']:.2e}  "
+            f"{result['original']}  =>  {result['planned']}"
+        )
+    return 0 if all(result['ok'] for result in results.values()) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,154 @@
+"""Rotated-pole grid helpers for the EURO-CORDEX (EUR-11) domain."""
+import numpy as np
+
+
+POLE_LATITUDE = 39.25
+POLE_LONGITUDE = -162.0
+
+# EUR-11 rotated grid: 424 x 412 cells of 0.11 degrees
+RLON = np.round(-28.375 + 0.11 * np.arange(424), 3)
+RLAT = np.round(-23.375 + 0.11 * np.arange(412), 3)
+RESOLUTION = 0.11
+
+# Cells kept around a cropped box so interpolation has neighbours at its edges
+CROP_CELLS = 2
+
+
+def _rotation(pole_latitude, pole_longitude):
+    tilt = np.deg2rad(90.0 - pole_latitude)
+    spin = np.deg2rad(pole_longitude + 180.0)
+    about_z = np.array([
+        [np.cos(spin), np.sin(spin), 0.0],
+        [-np.sin(spin), np.cos(spin), 0.0],
+        [0.0, 0.0, 1.0],
+    ])
+    about_y = np.array([
+        [np.cos(tilt), 0.0, np.sin(tilt)],
+        [0.0, 1.0, 0.0],
+        [-np.sin(tilt), 0.0, np.cos(tilt)],
+    ])
+    return about_y @ about_z
+
+
+def _transform(lat, lon, matrix):
+    lat = np.deg2rad(np.asarray(lat, dtype='float64'))
+    lon = np.deg2rad(np.asarray(lon, dtype='float64'))
+    xyz = np.stack([
+        np.cos(lat) * np.cos(lon),
+        np.cos(lat) * np.sin(lon),
+        np.sin(lat),
+    ])
+    x, y, z = np.tensordot(matrix, xyz, axes=1)
+    return (
+        np.rad2deg(np.arcsin(np.clip(z, -1.0, 1.0))),
+        np.rad2deg(np.arctan2(y, x)),
+    )
+
+
+def rotate(lat, lon, pole_latitude=POLE_LATITUDE, pole_longitude=POLE_LONGITUDE):
+    """Geographic (lat, lon) to rotated (rlat, rlon)."""
+    return _transform(lat, lon, _rotation(pole_latitude, pole_longitude))
+
+
+def unrotate(rlat, rlon, pole_latitude=POLE_LATITUDE, pole_longitude=POLE_LONGITUDE):
+    """Rotated (rlat, rlon) to geographic (lat, lon)."""
+    return _transform(rlat, rlon, _rotation(pole_latitude, pole_longitude).T)
+
+
+def pole_of(data):
+    """Rotated pole of a cube, falling back to the EURO-CORDEX pole."""
+    for name in ('rotated_pole', 'rotated_latitude_longitude'):
+        if name in getattr(data, 'coords', {}):
+            attrs = data.coords[name].attrs
+            return (
+                float(attrs['grid_north_pole_latitude']),
+                float(attrs['grid_north_pole_longitude']),
+            )
+    return POLE_LATITUDE, POLE_LONGITUDE
+
+
+def regular_axes(rlat, rlon, pole=(POLE_LATITUDE, POLE_LONGITUDE), resolution=None):
+    """Regular lat/lon axes covering a rotated grid at its own resolution."""
+    rlat = np.asarray(rlat, dtype='float64')
+    rlon = np.asarray(rlon, dtype='float64')
+    if resolution is None:
+        resolution = float(np.round(abs(rlon[1] - rlon[0]), 6))
+    # The extremes of a rotated grid lie on its outline
+    edge_rlat = np.concatenate([
+        rlat, rlat, np.full(rlon.size, rlat[0]), np.full(rlon.size, rlat[-1]),
+    ])
+    edge_rlon = np.concatenate([
+        np.full(rlat.size, rlon[0]), np.full(rlat.size, rlon[-1]), rlon, rlon,
+    ])
+    lat, lon = unrotate(edge_rlat, edge_rlon, *pole)
+    lat_axis = np.arange(
+        np.floor(lat.min() / resolution), np.ceil(lat.max() / resolution) + 1
+    ) * resolution
+    lon_axis = np.arange(
+        np.floor(lon.min() / resolution), np.ceil(lon.max() / resolution) + 1
+    ) * resolution
+    return np.round(lat_axis, 6), np.round(lon_axis, 6)
+
+
+def rotated_box(bounds, pole=(POLE_LATITUDE, POLE_LONGITUDE), samples=64):
+    """Rotated (south, north, west, east) box covering a geographic box.
+
+    ``bounds`` is (west, south, east, north). Rotated extremes of a box lie on
+    its outline, which is sampled densely.
+    """
+    west, south, east, north = bounds
+    t = np.linspace(0.0, 1.0, samples)
+    lat = np.concatenate([
+        south + (north - south) * t, south + (north - south) * t,
+        np.full(samples, south), np.full(samples, north),
+    ])
+    lon = np.concatenate([
+        np.full(samples, west), np.full(samples, east),
+        west + (east - west) * t, west + (east - west) * t,
+    ])
+    rlat, rlon = rotate(lat, lon, *pole)
+    return rlat.min(), rlat.max(), rlon.min(), rlon.max()
+
+
+def _crop_slice(axis, low, high, cells):
+    margin = cells * abs(float(axis[1] - axis[0])) if axis.size > 1 else 0.0
+    low, high = low - margin, high + margin
+    return slice(low, high) if axis[0] <= axis[-1] else slice(high, low)
+
+
+def crop_rotated(data, bounds, cells=CROP_CELLS, xref='rlon', yref='rlat'):
+    """Cells of a rotated-pole cube around a geographic (west, south, east, north) box."""
+    south, north, west, east = rotated_box(bounds, pole_of(data))
+    return data.sel({
+        yref: _crop_slice(data[yref].values, south, north, cells),
+        xref: _crop_slice(data[xref].values, west, east, cells),
+    })
+
+
+def crop_regular(data, bounds, cells=CROP_CELLS):
+    """Cells of a regular lat/lon cube around a (west, south, east, north) box."""
+    west, south, east, north = bounds
+    data = wrap_longitudes(data)
+    return data.sel(
+        lat=_crop_slice(data['lat'].values, south, north, cells),
+        lon=_crop_slice(data['lon'].values, west, east, cells),
+    )
+
+
+def to_area(bounds):
+    """CDS ``area`` ([north, west, south, east]) of a (west, south, east, north) box."""
+    west, south, east, north = bounds
+    return [north, west, south, east]
+
+
+def from_area(area):
+    north, west, south, east = (float(value) for value in area)
+    return west, south, east, north
+
+
+def wrap_longitudes(data, name='lon'):
+    """Shift a 0..360 longitude axis to -180..180, keeping it sorted."""
+    if name not in data.dims or float(data[name].max()) <= 180:
+        return data
+    lon = ((data[name] + 180) % 360) - 180
+    return data.assign_coords({name: lon}).sortby(name)
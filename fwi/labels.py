@@ -0,0 +1,238 @@
+"""Regional statistics from an integer label raster.
+
+``ct.shapes.average`` and the sparse weights of ``fwi.zonal`` only give
+area-weighted means. Here NUTS regions are rasterised once per (grid,
+regions) onto the working grid as an integer raster holding, for every
+cell, the index of the region containing its centre (-1 outside every
+region). The raster is stored under ``FWI_CACHE_DIR/labels``.
+
+``grouped`` reduces a (cells x samples) block for every (region, sample)
+pair at once: ``np.bincount`` gives counts, weighted means and standard
+deviations, and one sort by (group, value) gives minima, maxima, medians
+and percentiles. ``zonal_statistics`` applies it to a whole cube (model,
+time, ...) on a regular or rotated grid and returns the same ``nuts`` cube
+as ``ct.shapes.average``. With ``all_touched=True`` a cell can belong to
+several regions, so the cached ``fwi.zonal`` membership pairs are used
+instead of the raster.
+"""
+import os
+import tempfile
+import threading
+
+import numpy as np
+
+from fwi import grid, tracing, zonal
+from fwi.cache import CACHE_DIR
+
+
+LABELS_DIR = os.path.join(CACHE_DIR, 'labels')
+
+# Most values sorted at once, samples are processed in blocks of this size
+BLOCK_VALUES = 2 ** 22
+
+STATISTICS = ('count', 'mean', 'std', 'min', 'max', 'median')
+
+_labels = {}
+_lock = threading.Lock()
+
+
+def quantile_of(statistic):
+    """Quantile of an order statistic name ('min', 'median', 'p90', ...)."""
+    if statistic == 'min':
+        return 0.0
+    if statistic == 'max':
+        return 1.0
+    if statistic == 'median':
+        return 0.5
+    if statistic.startswith('p'):
+        try:
+            q = float(statistic[1:]) / 100
+        except ValueError:
+            q = None
+        if q is not None and 0.0 <= q <= 1.0:
+            return q
+    if statistic in STATISTICS:
+        return None
+    raise ValueError(
+        f'unknown statistic {statistic!r}, expected one of {STATISTICS} '
+        "or a percentile such as 'p90'"
+    )
+
+
+def labels_from_weights(weights):
+    """Label raster (flat) from a regions x cells membership matrix."""
+    coo = weights.tocoo()
+    labels = np.full(weights.shape[1], -1, dtype='int32')
+    labels[coo.col] = coo.row
+    return labels
+
+
+def _save(path, labels):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        np.save(f, labels)
+    os.replace(tmp_path, path)
+
+
+def get_labels(yaxis, xaxis, ids, geometries, pole=None):
+    """Flat label raster of ``geometries`` on a regular or rotated grid."""
+    key = '-'.join(
+        ['labels', zonal.grid_fingerprint(yaxis, xaxis)]
+        + ([zonal.grid_fingerprint(*pole)] if pole is not None else [])
+        + [zonal.regions_fingerprint(ids, geometries)]
+    )
+    with _lock:
+        if key in _labels:
+            return _labels[key]
+    path = os.path.join(LABELS_DIR, key + '.npy')
+    if os.path.exists(path):
+        labels = np.load(path)
+    else:
+        # Centre membership is shared with the sparse weights
+        if pole is None:
+            weights = zonal.get_weights(yaxis, xaxis, ids, geometries)
+        else:
+            weights = zonal.get_rotated_weights(yaxis, xaxis, pole, ids, geometries)
+        labels = labels_from_weights(weights)
+        _save(path, labels)
+    with _lock:
+        _labels[key] = labels
+    return labels
+
+
+def cell_areas(yaxis, xaxis):
+    """Flat relative cell areas of a regular or rotated grid."""
+    yaxis = np.asarray(yaxis, dtype='float64')
+    return np.outer(
+        np.cos(np.deg2rad(yaxis)) * np.abs(np.diff(zonal.cell_edges(yaxis))),
+        np.abs(np.diff(zonal.cell_edges(xaxis))),
+    ).ravel()
+
+
+def grouped(values, groups, cells, ngroups, statistics, areas=None):
+    """Statistics of ``values[cells]`` grouped by ``groups``, for every column.
+
+    ``values`` is (cells x samples), ``groups`` and ``cells`` list the
+    (region, cell) memberships and ``areas`` weights the means. Returns a
+    dict of (ngroups x samples) arrays, NaN where a group has no valid value.
+    """
+    values = np.asarray(values)
+    groups = np.asarray(groups, dtype='int64')
+    cells = np.asarray(cells, dtype='int64')
+    weights = (
+        np.ones(cells.size) if areas is None else np.asarray(areas, 'float64')[cells]
+    )
+    nsamples = values.shape[1]
+    quantiles = {name: quantile_of(name) for name in statistics}
+    result = {name: np.full((ngroups, nsamples), np.nan) for name in statistics}
+    step = max(1, BLOCK_VALUES // max(cells.size, 1))
+
+    for first in range(0, nsamples, step):
+        block = values[cells, first:first + step]
+        width = block.shape[1]
+        valid = np.isfinite(block)
+        keys = (groups[:, None] * width + np.arange(width))[valid]
+        sample = block[valid].astype('float64')
+        size = ngroups * width
+        count = np.bincount(keys, minlength=size)
+        out = {}
+        if {'count', 'mean', 'std'} & set(statistics):
+            w = np.broadcast_to(weights[:, None], block.shape)[valid]
+            norm = np.bincount(keys, w, minlength=size)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                mean = np.bincount(keys, w * sample, minlength=size) / norm
+                square = np.bincount(keys, w * sample ** 2, minlength=size) / norm
+            out.update(
+                count=count.astype('float64'), mean=mean,
+                std=np.sqrt(np.maximum(square - mean ** 2, 0.0)),
+            )
+        ordered = [name for name, q in quantiles.items() if q is not None]
+        if ordered:
+            order = np.lexsort((sample, keys))
+            sample = sample[order]
+            start = np.cumsum(count) - count
+            last = np.maximum(count - 1, 0)
+            for name in ordered:
+                # Linear interpolation between ranks, as np.quantile
+                position = quantiles[name] * last
+                low = np.floor(position).astype('int64')
+                high = np.minimum(low + 1, last)
+                fraction = position - low
+                found = count > 0
+                value = np.full(size, np.nan)
+                value[found] = (
+                    sample[start[found] + low[found]] * (1 - fraction[found])
+                    + sample[start[found] + high[found]] * fraction[found]
+                )
+                out[name] = value
+        for name in statistics:
+            if name == 'count':
+                values_out = out['count']
+            else:
+                values_out = np.where(count > 0, out[name], np.nan)
+            result[name][:, first:first + width] = values_out.reshape(ngroups, width)
+    return result
+
+
+@tracing.traced(name='labels.zonal_statistics')
+def zonal_statistics(data, nuts, statistic='mean', all_touched=False):
+    """Regional ``statistic`` of ``data``, drop-in for ``ct.shapes.average``.
+
+    ``statistic`` is one of ``STATISTICS``, a percentile ('p10', 'p90') or a
+    list of them, in which case the result gains a leading ``statistic``
+    dimension. Rotated-pole cubes are reduced on their native grid. Means of
+    cubes that are not local xarray objects are left to the toolbox.
+    """
+    names = [statistic] if isinstance(statistic, str) else list(statistic)
+    for name in names:
+        quantile_of(name)
+    rotated = hasattr(data, 'dims') and 'rlat' in data.dims
+    if not zonal._is_local(data, nuts):
+        if names != ['mean']:
+            raise ValueError('toolbox cubes only support the mean')
+        if rotated:
+            return zonal.rotated_average(data, nuts, all_touched)
+        return zonal.average(data, nuts, all_touched)
+
+    import xarray as xr
+
+    spatial_dims = ('rlat', 'rlon') if rotated else ('lat', 'lon')
+    yaxis, xaxis = (data[dim].values for dim in spatial_dims)
+    pole = grid.pole_of(data) if rotated else None
+    ids = [str(nuts_id) for nuts_id in nuts['NUTS_ID']]
+    geometries = np.asarray(nuts.geometry)
+    if all_touched:
+        if rotated:
+            weights = zonal.get_rotated_weights(
+                yaxis, xaxis, pole, ids, geometries, all_touched=True,
+            )
+        else:
+            weights = zonal.get_weights(yaxis, xaxis, ids, geometries, all_touched=True)
+        coo = weights.tocoo()
+        groups, cells = coo.row, coo.col
+    else:
+        labels = get_labels(yaxis, xaxis, ids, geometries, pole)
+        cells = np.nonzero(labels >= 0)[0]
+        groups = labels[cells]
+
+    other = [d for d in data.dims if d not in spatial_dims]
+    values = data.transpose(*spatial_dims, *other).values
+    flat = values.reshape(yaxis.size * xaxis.size, -1)
+    stats = grouped(
+        flat, groups, cells, len(ids), names, cell_areas(yaxis, xaxis),
+    )
+    shape = (len(ids),) + values.shape[2:]
+    cubes = [
+        zonal.nuts_cube(data, stats[name].reshape(shape), ids, spatial_dims)
+        for name in names
+    ]
+    if isinstance(statistic, str):
+        result = cubes[0]
+    else:
+        result = xr.concat(cubes, dim='statistic').assign_coords(statistic=names)
+    result = result.drop_vars(
+        [name for name in ('rotated_pole', 'rotated_latitude_longitude')
+         if name in result.coords]
+    )
+    return zonal.with_names(result, nuts)
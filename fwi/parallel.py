@@ -0,0 +1,47 @@
+"""Bounded concurrent execution of independent catalogue requests.
+
+``ordered_map`` fans a function out over a thread pool and returns results in
+input order, so concatenations stay deterministic. Functions decorated with
+``bounded`` share one process-wide limit of ``FWI_MAX_WORKERS`` concurrent
+calls, which keeps nested fan-outs (scenarios, then models) from flooding the
+catalogue. Setting ``FWI_MAX_WORKERS=1`` runs everything serially.
+"""
+import contextvars
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+MAX_WORKERS = int(os.environ.get('FWI_MAX_WORKERS', 6))
+
+_slots = threading.BoundedSemaphore(max(MAX_WORKERS, 1))
+
+
+def set_max_workers(max_workers):
+    global MAX_WORKERS, _slots
+    MAX_WORKERS = max_workers
+    _slots = threading.BoundedSemaphore(max(max_workers, 1))
+
+
+def ordered_map(func, items, max_workers=None):
+    """Concurrent ``map`` returning a list in the order of ``items``."""
+    items = list(items)
+    if max_workers is None:
+        max_workers = MAX_WORKERS
+    if max_workers <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
+    # Each task runs in a copy of the caller's context so tracing spans nest
+    contexts = [contextvars.copy_context() for _ in items]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as pool:
+        return list(pool.map(lambda c, item: c.run(func, item), contexts, items))
+
+
+def bounded(func):
+    """Limit concurrent calls of ``func`` to the shared worker budget."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        slots = _slots
+        with slots:
+            return func(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,113 @@
+"""Reordering of linear cube operations so reductions run first.
+
+A ``Pipeline`` is a list of ``Step``s written in the natural order
+(regrid, standardise time, average over time, ...). Means, bilinear
+regridding, zonal means and subtracting a fixed field are linear, so a
+reduction can run before any earlier linear step that works on other
+dimensions. ``plan`` moves every reduction as early as it can and drops
+steps that only relabel a dimension reduced later on, so the expensive
+spatial steps see one 2-D field instead of every time step.
+
+The swap is exact when missing values do not change along the reduced
+dimension, which holds for the fixed land-sea masks of the FWI datasets.
+``python -m fwi.equivalence`` checks the planned order against the original.
+"""
+from fwi import remap, tracing, zonal
+
+
+class Step:
+
+    def __init__(self, name, func, uses=(), reduces=(), relabels=(), linear=True):
+        self.name = name
+        self.func = func
+        self.uses = set(uses)
+        self.reduces = set(reduces)
+        self.relabels = set(relabels)
+        self.linear = linear
+
+    def __repr__(self):
+        return f'Step({self.name!r})'
+
+
+class Pipeline:
+
+    def __init__(self, steps):
+        self.steps = list(steps)
+
+    def plan(self):
+        """Equivalent pipeline with reductions moved as early as possible."""
+        steps = list(self.steps)
+        # Relabelling a dimension that is averaged away later changes nothing
+        steps = [
+            step for i, step in enumerate(steps)
+            if not step.relabels or not step.relabels <= set().union(
+                *(later.reduces for later in steps[i + 1:])
+            )
+        ]
+        for step in list(steps):
+            if not step.reduces:
+                continue
+            j = steps.index(step)
+            while j > 0 and _commutes(steps[j - 1], step):
+                steps[j - 1], steps[j] = steps[j], steps[j - 1]
+                j -= 1
+        return Pipeline(steps)
+
+    def run(self, data, planned=True):
+        pipeline = self.plan() if planned else self
+        with tracing.span('pipeline', steps=[s.name for s in pipeline.steps]):
+            for step in pipeline.steps:
+                data = step.func(data)
+        return data
+
+    __call__ = run
+
+    def describe(self):
+        return ' -> '.join(step.name for step in self.steps)
+
+
+def _commutes(earlier, reduction):
+    return (
+        earlier.linear and reduction.linear
+        and not earlier.reduces
+        and not earlier.uses & reduction.uses
+    )
+
+
+def time_mean():
+    import cdstoolbox as ct
+
+    return Step(
+        'time_mean', lambda data: ct.cube.average(data, dim='time'),
+        uses=['time'], reduces=['time'],
+    )
+
+
+def make_regular():
+    return Step(
+        'make_regular',
+        lambda data: remap.make_regular(data, xref='rlon', yref='rlat',
+                                        drop_encoding=['rlon', 'rlat']),
+        uses=['rlat', 'rlon', 'lat', 'lon'],
+    )
+
+
+def standardise_time():
+    import cdstoolbox as ct
+
+    return Step(
+        'standardise_time', ct.cdm.standardise_time,
+        uses=['time'], relabels=['time'],
+    )
+
+
+def zonal_mean(nuts, all_touched=False):
+    return Step(
+        'zonal_mean', lambda data: zonal.average(data, nuts, all_touched),
+        uses=['lat', 'lon', 'nuts'],
+    )
+
+
+def subtract(reference, uses=('lat', 'lon')):
+    """Subtract a field that does not vary along any reduced dimension."""
+    return Step('subtract', lambda data: data - reference, uses=uses)
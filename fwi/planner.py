@@ -0,0 +1,150 @@
+"""Planning of catalogue requests over year ranges.
+
+The catalogue serves a dataset in fixed chunks: one file per year for the
+daily indicators, 5-year periods for the seasonal ones. ``plan`` maps a year
+range onto the chunks that overlap it, drops the chunks that are already
+cached, and batches the rest into list-valued requests of at most
+``batch_size`` chunks. ``fetch`` sends those batches and stores each chunk
+of the answer under its own single-chunk request key, so the per-chunk
+``retrieve`` calls that follow are cache hits.
+
+Recent plans are kept in ``history`` and attached to the current trace span.
+"""
+import collections
+import os
+
+from fwi import tracing
+from fwi.cache import RETRIEVAL_CACHE, request_key
+from fwi.parallel import bounded, ordered_map
+
+
+# Most chunks the catalogue accepts in a single request
+MAX_CHUNKS = int(os.environ.get('FWI_MAX_CHUNKS', 20))
+
+history = collections.deque(maxlen=50)
+
+
+def chunk_years(chunk):
+    bounds = [int(year) for year in str(chunk).split('_')]
+    return bounds[0], bounds[-1]
+
+
+def overlapping(chunks, start, stop):
+    """Chunks holding at least one year of ``start..stop``, in catalogue order."""
+    return [
+        chunk for chunk in chunks
+        if chunk_years(chunk)[0] <= stop and chunk_years(chunk)[1] >= start
+    ]
+
+
+class Plan:
+
+    def __init__(self, dataset, request, field, start, stop, chunks, cached, batches):
+        self.dataset = dataset
+        self.request = request
+        self.field = field
+        self.start = start
+        self.stop = stop
+        self.chunks = chunks
+        self.cached = cached
+        self.batches = batches
+
+    @property
+    def missing(self):
+        return [chunk for batch in self.batches for chunk in batch]
+
+    def chunk_request(self, chunk):
+        return {**self.request, self.field: chunk}
+
+    def to_dict(self):
+        return {
+            'dataset': self.dataset,
+            'request': self.request,
+            'years': [self.start, self.stop],
+            'chunks': self.chunks,
+            'cached': self.cached,
+            'batches': self.batches,
+        }
+
+    def report(self):
+        return (
+            f'{self.dataset} {self.start}-{self.stop}: {len(self.chunks)} chunks, '
+            f'{len(self.cached)} cached, {len(self.missing)} to fetch in '
+            f'{len(self.batches)} requests {self.batches}'
+        )
+
+
+def plan(dataset, request, chunks, start, stop, cached=None, field='period',
+         batch_size=None, cache=RETRIEVAL_CACHE):
+    """Plan the retrieval of ``start..stop`` from ``chunks`` of ``dataset``.
+
+    A chunk counts as cached when its single-chunk retrieval is in ``cache``
+    or when ``cached(chunk)`` is true (for results derived from it).
+    """
+    batch_size = min(batch_size or MAX_CHUNKS, MAX_CHUNKS)
+    needed = overlapping(chunks, start, stop)
+    have = [
+        chunk for chunk in needed
+        if request_key(dataset, {**request, field: chunk}) in cache
+        or (cached is not None and cached(chunk))
+    ]
+    missing = [chunk for chunk in needed if chunk not in have]
+    batches = [
+        missing[i:i + batch_size] for i in range(0, len(missing), batch_size)
+    ]
+    result = Plan(dataset, dict(request), field, start, stop, needed, have, batches)
+    history.append(result.to_dict())
+    tracing.annotate(plan=result.report())
+    return result
+
+
+def _split(data, batch):
+    import cdstoolbox as ct
+
+    if len(batch) == 1:
+        return {batch[0]: data}
+    parts = {}
+    for chunk in batch:
+        first, last = chunk_years(chunk)
+        if hasattr(data, 'isel'):
+            # Year labels work whatever the model calendar
+            years = data['time'].dt.year.values
+            parts[chunk] = data.isel(time=(years >= first) & (years <= last))
+        else:
+            parts[chunk] = ct.cube.select(
+                data, start_time=str(first), stop_time=str(last),
+            )
+    return parts
+
+
+@tracing.traced(name='planner.fetch')
+def fetch(plan, cache=RETRIEVAL_CACHE, batches=None, reduce=None):
+    """Retrieve the missing chunks of ``plan`` and cache them one by one.
+
+    Each batch is a single-flight miss of ``cache`` on its own request key
+    and takes a slot of the shared ``bounded`` worker budget. ``batches``
+    restricts the fetch to some of the plan's batches, and ``reduce(chunk,
+    data)`` is called on every chunk downloaded.
+    """
+    import cdstoolbox as ct
+
+    @bounded
+    def fetch_batch(batch):
+        request = plan.chunk_request(batch if len(batch) > 1 else batch[0])
+        keys = {
+            chunk: request_key(plan.dataset, plan.chunk_request(chunk))
+            for chunk in batch
+        }
+
+        def download():
+            data = ct.catalogue.retrieve(plan.dataset, request)
+            for chunk, part in _split(data, batch).items():
+                cache.put(keys[chunk], part)
+                if reduce is not None:
+                    reduce(chunk, part)
+
+        # A concurrent plan may have stored these chunks since this one
+        cache.fill(request_key(plan.dataset, request), download, keys.values())
+
+    ordered_map(fetch_batch, plan.batches if batches is None else batches)
+    return plan
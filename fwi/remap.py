@@ -0,0 +1,126 @@
+"""Rotated-pole to regular lat/lon regridding from a precomputed sparse map.
+
+Every EURO-CORDEX cube shares one rotated grid, so the bilinear weights that
+``make_regular`` needs are computed once per (rotated axes, pole) and stored
+under ``FWI_CACHE_DIR`` as a sparse regular cells x rotated cells matrix.
+Regridding is then one sparse product batched over every other dimension
+(time, gcm_model, ...). Regular cells outside the rotated domain are NaN, as
+with linear interpolation.
+"""
+import os
+
+import numpy as np
+
+from fwi import grid, tracing, zonal
+from fwi.cache import CACHE_DIR
+
+
+REMAP_DIR = os.path.join(CACHE_DIR, 'remap')
+
+
+def _bracket(axis, points):
+    """Lower neighbour index and fraction of ``points`` on an ascending ``axis``."""
+    i = np.clip(np.searchsorted(axis, points, side='right') - 1, 0, axis.size - 2)
+    fraction = (points - axis[i]) / (axis[i + 1] - axis[i])
+    inside = (fraction >= 0.0) & (fraction <= 1.0)
+    return i, fraction, inside
+
+
+def build_remap(rlat, rlon, lat, lon, pole):
+    """Sparse (lat*lon x rlat*rlon) matrix of bilinear weights."""
+    from scipy import sparse
+
+    rlat = np.asarray(rlat, dtype='float64')
+    rlon = np.asarray(rlon, dtype='float64')
+    # Work on ascending axes, mapping back to the cube's own ordering
+    order_lat = np.argsort(rlat)
+    order_lon = np.argsort(rlon)
+    lat2d, lon2d = np.meshgrid(lat, lon, indexing='ij')
+    target_rlat, target_rlon = grid.rotate(lat2d.ravel(), lon2d.ravel(), *pole)
+    i, fy, inside_y = _bracket(rlat[order_lat], target_rlat)
+    j, fx, inside_x = _bracket(rlon[order_lon], target_rlon)
+    rows = np.nonzero(inside_y & inside_x)[0]
+    i, fy, j, fx = i[rows], fy[rows], j[rows], fx[rows]
+
+    corners = [
+        (i, j, (1 - fy) * (1 - fx)),
+        (i, j + 1, (1 - fy) * fx),
+        (i + 1, j, fy * (1 - fx)),
+        (i + 1, j + 1, fy * fx),
+    ]
+    weights = sparse.csr_matrix(
+        (
+            np.concatenate([w for _, _, w in corners]),
+            (
+                np.tile(rows, 4),
+                np.concatenate([
+                    order_lat[ii] * rlon.size + order_lon[jj]
+                    for ii, jj, _ in corners
+                ]),
+            ),
+        ),
+        shape=(lat.size * lon.size, rlat.size * rlon.size),
+    )
+    weights.eliminate_zeros()
+    return weights
+
+
+def get_remap(rlat, rlon, pole):
+    lat, lon = grid.regular_axes(rlat, rlon, pole)
+    key = '-'.join([
+        'remap', zonal.grid_fingerprint(rlat, rlon),
+        zonal.grid_fingerprint(*pole),
+    ])
+    weights = zonal.cached_weights(
+        key, lambda: build_remap(rlat, rlon, lat, lon, pole), REMAP_DIR,
+    )
+    return weights, lat, lon
+
+
+def apply_remap(data, weights, lat, lon, xref='rlon', yref='rlat'):
+    """Regrid ``data`` with ``weights``, keeping every other dimension."""
+    import xarray as xr
+
+    other = [d for d in data.dims if d not in (yref, xref)]
+    values = data.transpose(yref, xref, *other).values
+    flat = values.reshape(weights.shape[1], -1)
+    regular = weights @ flat
+    # Regular cells outside the rotated domain have no weights
+    regular[np.diff(weights.indptr) == 0] = np.nan
+    if np.issubdtype(values.dtype, np.floating):
+        regular = regular.astype(values.dtype, copy=False)
+    regular = regular.reshape((lat.size, lon.size) + values.shape[2:])
+
+    coords = {
+        name: coord for name, coord in data.coords.items()
+        if not set(coord.dims) & {xref, yref} and name != 'rotated_pole'
+    }
+    coords.update(lat=lat, lon=lon)
+    result = xr.DataArray(
+        regular, dims=('lat', 'lon', *other), coords=coords,
+        name=data.name, attrs=dict(data.attrs),
+    )
+    dims = ['lat' if d == yref else 'lon' if d == xref else d for d in data.dims]
+    return result.transpose(*dims)
+
+
+def local_make_regular(data, xref='rlon', yref='rlat'):
+    weights, lat, lon = get_remap(
+        data[yref].values, data[xref].values, grid.pole_of(data),
+    )
+    return apply_remap(data, weights, lat, lon, xref, yref)
+
+
+@tracing.traced(name='remap.make_regular')
+def make_regular(data, xref='rlon', yref='rlat', drop_encoding=None):
+    """Drop-in for ``ct.geo.make_regular`` on rotated-pole cubes.
+
+    Cubes that are not local xarray objects are passed on to the toolbox.
+    """
+    if not hasattr(data, 'dims'):
+        import cdstoolbox as ct
+
+        return ct.geo.make_regular(
+            data, xref=xref, yref=yref, drop_encoding=drop_encoding,
+        )
+    return local_make_regular(data, xref, yref)
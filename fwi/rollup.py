@@ -0,0 +1,76 @@
+"""Higher NUTS levels from NUTS 3 means.
+
+A NUTS_ID starts with its parents' ids: ``FRK26`` (level 3) is in ``FRK2``
+(level 2), ``FRK`` (level 1) and ``FR`` (country, level 0). The mean of a
+parent region is the mean of its NUTS 3 children weighted by the area of
+their valid cells, which ``fwi.zonal`` keeps as the ``area`` coordinate of
+its ``nuts`` cubes. ``rollup`` turns a (..., nuts) NUTS 3 cube into any
+higher level with one small matrix product, without going back to the grid.
+With centre membership the result equals averaging the parent polygons
+directly. Only means roll up, order statistics such as medians do not.
+"""
+import numpy as np
+
+
+LEVELS = [
+    {'value': 3, 'label': 'NUTS 3'},
+    {'value': 2, 'label': 'NUTS 2'},
+    {'value': 1, 'label': 'NUTS 1'},
+    {'value': 0, 'label': 'Countries'},
+]
+
+
+def level_of(nuts_id):
+    return len(str(nuts_id)) - 2
+
+
+def parent_of(nuts_id, level):
+    return str(nuts_id)[:level + 2]
+
+
+def children(nuts_id, ids):
+    """NUTS 3 ids in ``ids`` that belong to ``nuts_id``."""
+    return [str(i) for i in ids if str(i).startswith(str(nuts_id))]
+
+
+def rollup(data, level, areas=None):
+    """Area-weighted means of a NUTS 3 ``nuts`` cube at ``level``.
+
+    ``areas`` defaults to the ``area`` coordinate of ``data``. The result
+    keeps the summed areas of valid children, so it can be rolled up again.
+    """
+    import xarray as xr
+
+    ids = [str(i) for i in data['nuts'].values]
+    if all(level_of(i) == level for i in ids):
+        return data
+    if areas is None:
+        if 'area' not in data.coords:
+            raise ValueError('rolling up needs the area of each region')
+        areas = data['area'].values
+    parents, inverse = np.unique(
+        [parent_of(i, level) for i in ids], return_inverse=True,
+    )
+    membership = np.zeros((len(ids), parents.size))
+    membership[np.arange(len(ids)), inverse] = np.asarray(areas, 'float64')
+
+    other = [d for d in data.dims if d != 'nuts']
+    values = data.transpose(*other, 'nuts').values
+    valid = np.isfinite(values)
+    totals = np.where(valid, values, 0.0) @ membership
+    norms = valid @ membership
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = np.where(norms > 0, totals / norms, np.nan)
+
+    coords = {
+        name: coord for name, coord in data.coords.items()
+        if 'nuts' not in coord.dims
+    }
+    coords['nuts'] = parents.tolist()
+    coords['area'] = ('nuts', norms.reshape(-1, parents.size).max(axis=0))
+    result = xr.DataArray(
+        means, dims=(*other, 'nuts'), coords=coords,
+        name=data.name, attrs=data.attrs,
+    )
+    return result.transpose(*data.dims)
+
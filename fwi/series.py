@@ -0,0 +1,189 @@
+"""Region-major Zarr store of daily regional series.
+
+For one (variable, model, scenario) the NUTS 3 daily means of every year are
+kept in a single ``(regions, years x 366)`` Zarr array. Each year owns 366
+slots, and a chunk holds one year of ``REGION_BLOCK`` regions, so writing a
+year touches only that year's chunks and a region's series is read from one
+small chunk per year. Slots past a year's last day are padding, with NaT in
+the ``time`` array. Times are stored as ``datetime64[ns]``, so partitions
+must be on the standard calendar (``ct.cdm.standardise_time``). Years are
+written on demand from a ``partition(year)`` callback, and clicks read a
+region through a small JSON-ready ``handle`` instead of carrying the cube.
+The store directory is named after ``STORE_VERSION`` and needs ``zarr>=3``.
+"""
+import os
+import threading
+
+import numpy as np
+
+from fwi import rollup
+from fwi.cache import CACHE_DIR
+from fwi.parallel import ordered_map
+
+
+SERIES_DIR = os.path.join(CACHE_DIR, 'series')
+
+# Bump when the layout changes (2: one chunk per year and block of regions)
+STORE_VERSION = 2
+
+# Slots per year, enough for a leap year
+SLOTS = 366
+
+# Regions per chunk
+REGION_BLOCK = 32
+
+NAT = np.iinfo('int64').min
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+class DailySeriesStore:
+
+    def __init__(self, name, first_year, last_year, directory=None):
+        self.name = name
+        self.first_year = first_year
+        self.last_year = last_year
+        self.path = os.path.join(
+            directory or SERIES_DIR, f'{name}-v{STORE_VERSION}.zarr',
+        )
+        self._group = None
+        self._lock = threading.Lock()
+        if os.path.exists(self.path):
+            self._open()
+
+    def _open(self):
+        import zarr
+
+        self._group = zarr.open_group(self.path, mode='a')
+
+    def _create(self, ids, areas):
+        import zarr
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        slots = (self.last_year - self.first_year + 1) * SLOTS
+        group = zarr.open_group(self.path, mode='w')
+        group.create_array(
+            'values', shape=(len(ids), slots), chunks=(REGION_BLOCK, SLOTS),
+            dtype='float32', fill_value=np.nan,
+        )
+        group.create_array(
+            'time', shape=(slots,), chunks=(SLOTS,), dtype='int64', fill_value=NAT,
+        )
+        group.create_array(
+            'filled', shape=(self.last_year - self.first_year + 1,),
+            dtype='bool', fill_value=False,
+        )
+        group.attrs['ids'] = list(ids)
+        if areas is not None:
+            group.attrs['areas'] = [float(a) for a in areas]
+        self._group = group
+
+    def _index(self, year):
+        if not self.first_year <= year <= self.last_year:
+            raise ValueError(
+                f'{year} is outside {self.first_year}-{self.last_year}'
+            )
+        return year - self.first_year
+
+    @property
+    def ids(self):
+        return None if self._group is None else list(self._group.attrs['ids'])
+
+    def missing(self, start, stop):
+        if self._group is None:
+            return list(range(start, stop + 1))
+        filled = self._group['filled'][self._index(start):self._index(stop) + 1]
+        return [
+            year for year, done in zip(range(start, stop + 1), filled) if not done
+        ]
+
+    def fill(self, start, stop, partition):
+        """Write the missing years of ``start..stop`` from ``partition(year)``."""
+        missing = self.missing(start, stop)
+        if not missing:
+            return
+        for run in _runs(missing):
+            parts = ordered_map(partition, run)
+            with self._lock:
+                self._write(run, parts)
+
+    def _write(self, years, parts):
+        first = parts[0]
+        ids = [str(i) for i in first['nuts'].values]
+        if self.ids != ids:
+            # A new set of regions invalidates everything stored so far
+            areas = first['area'].values if 'area' in first.coords else None
+            self._create(ids, areas)
+        start = self._index(years[0]) * SLOTS
+        block = np.full((len(ids), len(years) * SLOTS), np.nan, dtype='float32')
+        times = np.full(len(years) * SLOTS, NAT, dtype='int64')
+        for i, part in enumerate(parts):
+            part = part.transpose('nuts', 'time')
+            size = part.sizes['time']
+            block[:, i * SLOTS:i * SLOTS + size] = part.values
+            times[i * SLOTS:i * SLOTS + size] = (
+                part['time'].values.astype('datetime64[ns]').astype('int64')
+            )
+        self._group['values'][:, start:start + block.shape[1]] = block
+        self._group['time'][start:start + times.size] = times
+        self._group['filled'][self._index(years[0]):self._index(years[-1]) + 1] = True
+
+    def read(self, nuts_id, start, stop):
+        """Daily series of ``nuts_id`` (any NUTS level), None if not stored."""
+        import xarray as xr
+
+        if self.missing(start, stop):
+            return None
+        ids = self.ids
+        wanted = rollup.children(nuts_id, ids)
+        if not wanted:
+            return None
+        first = self._index(start) * SLOTS
+        last = (self._index(stop) + 1) * SLOTS
+        times = self._group['time'][first:last]
+        used = times != NAT
+        rows = [ids.index(i) for i in wanted]
+        values = self._group['values'].oindex[rows, first:last]
+        coords = {
+            'time': times[used].astype('datetime64[ns]'),
+            'nuts': wanted,
+        }
+        if 'areas' in self._group.attrs:
+            areas = np.asarray(self._group.attrs['areas'])
+            coords['area'] = ('nuts', areas[rows])
+        data = xr.DataArray(
+            values[:, used].T, dims=('time', 'nuts'), coords=coords,
+        )
+        data = rollup.rollup(data, rollup.level_of(nuts_id))
+        return data.sel(nuts=str(nuts_id))
+
+    def handle(self):
+        return {
+            'name': self.name,
+            'first_year': self.first_year,
+            'last_year': self.last_year,
+        }
+
+
+def _runs(years):
+    """Split sorted ``years`` into runs of consecutive years."""
+    runs = [[years[0]]]
+    for year in years[1:]:
+        if year == runs[-1][-1] + 1:
+            runs[-1].append(year)
+        else:
+            runs.append([year])
+    return runs
+
+
+def get_series(name, first_year, last_year):
+    """Shared store instance for ``name``."""
+    with _stores_lock:
+        if name not in _stores:
+            _stores[name] = DailySeriesStore(name, first_year, last_year)
+        return _stores[name]
+
+
+def from_handle(handle):
+    return get_series(handle['name'], handle['first_year'], handle['last_year'])
@@ -0,0 +1,63 @@
+"""Running reductions over catalogue requests spanning many years.
+
+``RunningMean`` folds fields in one at a time with Welford's update and a
+per-cell count of valid values, so averaging N fields holds only the running
+state and the current field. ``iter_years`` sends a multi-year request once
+and hands it back one year at a time: backends with ``ct.catalogue.stream``
+(the local one) read a single year per step, others return one cube that is
+sliced by year.
+"""
+import numpy as np
+
+
+class RunningMean:
+
+    def __init__(self):
+        self.count = None
+        self.mean = None
+
+    def update(self, values):
+        valid = np.isfinite(values)
+        values = values.where(valid, 0.0)
+        if self.mean is None:
+            self.count = valid.astype('int64')
+            self.mean = values.astype('float64')
+            return
+        self.count = self.count + valid
+        delta = (values - self.mean) / self.count.where(self.count > 0, 1)
+        self.mean = self.mean + delta.where(valid, 0.0)
+
+    def result(self):
+        if self.mean is None:
+            raise ValueError('no values were added')
+        return self.mean.where(self.count > 0)
+
+
+def iter_years(dataset, request, field='year'):
+    """Yield ``request`` one value of its ``field`` list at a time."""
+    import cdstoolbox as ct
+
+    stream = getattr(ct.catalogue, 'stream', None)
+    if stream is not None:
+        yield from stream(dataset, request, field)
+        return
+    data = ct.catalogue.retrieve(dataset, request)
+    for year in request[field]:
+        yield ct.cube.select(
+            data, start_time=f'{year}-01-01', stop_time=f'{year}-12-31',
+        )
+
+
+def mean_of_yearly_means(dataset, request, field='year'):
+    """Mean over years of each year's time mean, one year in memory at a time."""
+    import cdstoolbox as ct
+
+    running = RunningMean()
+    attrs = None
+    for data in iter_years(dataset, request, field):
+        data = ct.cube.average(data, dim='time')
+        attrs = attrs or dict(data.attrs)
+        running.update(data)
+    result = running.result()
+    result.attrs = attrs
+    return result
@@ -0,0 +1,94 @@
+"""Box-plot summaries of per-model values for every comparison group at once.
+
+The comparison charts draw one box per time horizon or RCP over the values
+of the available models. ``box_summaries`` stacks the groups into one
+NaN-padded (groups, models, ...) array and computes quartiles, Tukey
+whiskers (the most extreme values within 1.5 IQR of the box), mean and
+outliers in a single vectorised pass. ``box_trace`` turns a summary into
+the five values and precomputed Plotly box fields used by ``ct.chart.box``.
+"""
+import numpy as np
+
+
+FIELDS = ('q1', 'median', 'q3', 'lowerfence', 'upperfence', 'mean')
+
+WHISKER = 1.5
+
+
+def box_summaries(cubes, dim='gcm_model'):
+    """One summary per cube of its values along ``dim``.
+
+    Each summary holds ``FIELDS`` as scalars for 1-D cubes and arrays over
+    the remaining dimensions otherwise. ``outliers`` lists the outlying
+    values of 1-D cubes, and is a (models, ...) array that is NaN except at
+    outliers otherwise.
+    """
+    if not cubes:
+        return []
+    arrays = [np.asarray(c.transpose(dim, ...).values, dtype='float64') for c in cubes]
+    size = max(a.shape[0] for a in arrays)
+    values = np.stack([
+        np.concatenate([a, np.full((size - a.shape[0],) + a.shape[1:], np.nan)])
+        for a in arrays
+    ])
+    valid = np.isfinite(values)
+    found = valid.any(axis=1)
+    with np.errstate(invalid='ignore'):
+        safe = np.where(found[:, None], values, 0.0)
+        q1, median, q3 = np.nanpercentile(safe, [25, 50, 75], axis=1)
+        mean = np.nanmean(safe, axis=1)
+    low = q1 - WHISKER * (q3 - q1)
+    high = q3 + WHISKER * (q3 - q1)
+    inside = valid & (values >= low[:, None]) & (values <= high[:, None])
+    lowerfence = np.where(inside, values, np.inf).min(axis=1)
+    upperfence = np.where(inside, values, -np.inf).max(axis=1)
+    outside = valid & ~inside
+
+    stats = {
+        'q1': q1, 'median': median, 'q3': q3, 'lowerfence': lowerfence,
+        'upperfence': upperfence, 'mean': mean,
+    }
+    summaries = []
+    for i in range(len(cubes)):
+        summary = {
+            name: np.where(found[i], stat[i], np.nan) for name, stat in stats.items()
+        }
+        summary = {
+            name: value.item() if value.ndim == 0 else value
+            for name, value in summary.items()
+        }
+        if values.ndim == 2:
+            summary['outliers'] = values[i][outside[i]].tolist()
+        else:
+            summary['outliers'] = np.where(outside[i], values[i], np.nan)
+        summaries.append(summary)
+    return summaries
+
+
+def box_trace(summary, name):
+    """Five-value cube and precomputed box fields of a 1-D ``summary``.
+
+    The cube holds the whiskers and quartiles, so the box drawn from it with
+    the inclusive quartile method is the same as the precomputed one.
+    """
+    import xarray as xr
+
+    five = [summary[f] for f in ('lowerfence', 'q1', 'median', 'q3', 'upperfence')]
+    data = xr.DataArray(np.asarray(five), dims=('statistic',), coords={
+        'statistic': ['lowerfence', 'q1', 'median', 'q3', 'upperfence'],
+    })
+    kwargs = {field: [summary[field]] for field in FIELDS}
+    kwargs.update(name=name, quartilemethod='inclusive', boxmean=True)
+    return data, kwargs
+
+
+def outlier_points(summary, name):
+    """Cube of the outliers of a 1-D ``summary`` placed at box ``name``."""
+    import xarray as xr
+
+    outliers = summary['outliers']
+    if not outliers:
+        return None
+    return xr.DataArray(
+        np.asarray(outliers), dims=('box',), coords={'box': [name] * len(outliers)},
+    )
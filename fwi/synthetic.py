@@ -0,0 +1,287 @@
+"""Offline stand-in for the catalogue datasets and NUTS shapes.
+
+``install`` registers deterministic synthetic generators with the local
+backend for 'sis-tourism-fire-danger-indicators' (daily and seasonal
+indicators, single models and multi-model cases) and 'cems-fire-historical',
+and replaces the NUTS shapes with a nested tiling of Europe. Every year of a
+request (one model, experiment and year) is seeded from its normalised
+request, so a given year has the same values in every period. A fixed,
+seeded sea mask of ``SEA_FRACTION`` of the cells, in blocks of
+``SEA_BLOCK`` x ``SEA_BLOCK`` grid cells, is NaN in every FWI cube, so some
+regions are partly and some wholly without data.
+
+Data size is set with ``stride``, which subsamples the EUR-11 rotated grid
+(and the 0.25 degree reanalysis grid); ``latency`` and ``bandwidth`` add a
+fixed delay per request and a delay per byte returned::
+
+    from fwi import synthetic, toolbox
+
+    synthetic.install(stride=4, latency=0.5)
+    app = toolbox.load_app('final/FinalProduct.py')
+"""
+import functools
+import time
+
+import numpy as np
+
+from fwi import grid
+from fwi.cache import request_key
+
+
+MODELS = {
+    'historical': ['cnrm_cm5', 'ec_earth', 'hadgem2_es', 'ipsl_cm5a_mr', 'mpi_esm_lr', 'noresm1_m'],
+    'rcp8_5': ['cnrm_cm5', 'ec_earth', 'hadgem2_es', 'ipsl_cm5a_mr', 'mpi_esm_lr', 'noresm1_m'],
+    'rcp4_5': ['cnrm_cm5', 'ec_earth', 'hadgem2_es', 'ipsl_cm5a_mr', 'mpi_esm_lr'],
+    'rcp2_6': ['ec_earth', 'hadgem2_es', 'mpi_esm_lr', 'noresm1_m'],
+}
+
+CALENDARS = {
+    'cnrm_cm5': 'standard',
+    'ec_earth': 'standard',
+    'hadgem2_es': '360_day',
+    'ipsl_cm5a_mr': 'noleap',
+    'mpi_esm_lr': 'proleptic_gregorian',
+    'noresm1_m': 'noleap',
+}
+
+SEASONAL_PERIODS = [
+    '1981_2005', '2021_2040', '2041_2060', '2079_2098',
+    '2006_2010', '2011_2015', '2016_2020', '2021_2025', '2026_2030',
+    '2031_2035', '2036_2040', '2041_2045', '2046_2050', '2051_2055',
+    '2056_2060', '2061_2065', '2066_2070', '2071_2075', '2076_2080',
+    '2081_2085', '2086_2090', '2091_2095', '2096_2098',
+]
+
+# Warming of the seasonal FWI in index points per year after 2005
+TRENDS = {'historical': 0.0, 'rcp2_6': 0.02, 'rcp4_5': 0.05, 'rcp8_5': 0.1}
+
+MODEL_STATISTICS = {'best': -3.0, 'mean': 0.0, 'worst': 3.0}
+
+# Countries, then NUTS 1, 2 and 3 splits of each parent tile (columns, rows)
+NUTS_SPLITS = [(6, 6), (1, 2), (2, 2), (2, 3)]
+NUTS_EXTENT = (-10.0, 35.0, 40.0, 71.0)
+NUTS_CODES = '123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+SETTINGS = {'stride': 1, 'latency': 0.0, 'bandwidth': None, 'seed': 0}
+
+# Share of the EUR-11 grid that is sea, drawn in square blocks of cells
+SEA_FRACTION = 0.2
+SEA_BLOCK = 16
+SEA_SEED = 11
+
+
+def _years(period):
+    bounds = [int(year) for year in str(period).split('_')]
+    return list(range(bounds[0], bounds[-1] + 1))
+
+
+def _rng(dataset, request):
+    # Cropping must not change the values, so the area is not part of the seed
+    request = {k: v for k, v in request.items() if k != 'area'}
+    key = request_key(dataset, request)
+    return np.random.default_rng([int(key[:16], 16), SETTINGS['seed']])
+
+
+def _climate(lat, year, experiment, offset=0.0):
+    # Hot and dry in the south, mild in the north, warming with the scenario
+    base = np.clip(45.0 - 1.3 * (lat - 35.0), 1.0, None)
+    return base + offset + TRENDS[experiment] * max(year - 2005, 0)
+
+
+def _rotated_coords():
+    stride = SETTINGS['stride']
+    rlat = grid.RLAT[::stride]
+    rlon = grid.RLON[::stride]
+    lat, lon = grid.unrotate(*np.meshgrid(rlat, rlon, indexing='ij'))
+    return rlat, rlon, lat, lon
+
+
+@functools.lru_cache(maxsize=None)
+def sea_mask():
+    """Boolean (rlat, rlon) mask of the sea cells of the full EUR-11 grid."""
+    rng = np.random.default_rng(SEA_SEED)
+    blocks = rng.random((
+        -(-grid.RLAT.size // SEA_BLOCK), -(-grid.RLON.size // SEA_BLOCK),
+    )) < SEA_FRACTION
+    mask = np.repeat(np.repeat(blocks, SEA_BLOCK, axis=0), SEA_BLOCK, axis=1)
+    return mask[:grid.RLAT.size, :grid.RLON.size]
+
+
+def _days(years, calendar, months=None, days=None):
+    import xarray as xr
+
+    times = xr.date_range(
+        f'{years[0]}-01-01', f'{years[-1] + 1}-01-01', freq='D',
+        calendar=calendar, use_cftime=True, inclusive='left',
+    )
+    keep = np.ones(len(times), dtype=bool)
+    if months is not None:
+        keep &= np.isin(times.month, [int(m) for m in np.atleast_1d(months)])
+    if days is not None:
+        keep &= np.isin(times.day, [int(d) for d in np.atleast_1d(days)])
+    return times[keep]
+
+
+def fire_danger_indicators(dataset, request):
+    """One model (or multi-model case), experiment and period of FWI data."""
+    import cftime
+    import xarray as xr
+
+    experiment = str(request['experiment']).lower()
+    period = str(request['period'])
+    product_type = request['product_type']
+    daily = request['time_aggregation'] == 'daily_indicators'
+    if product_type == 'single_model':
+        model = request['gcm_model']
+        if model not in MODELS[experiment]:
+            raise ValueError(f'{model} is not available for {experiment}')
+        calendar = CALENDARS[model]
+        offset = (sorted(CALENDARS).index(model) - 2.5) * 1.5
+    else:
+        model = None
+        calendar = 'standard'
+        offset = MODEL_STATISTICS[product_type.split('_')[2]]
+    if not daily and period not in SEASONAL_PERIODS:
+        raise ValueError(f'Unknown seasonal period {period}')
+
+    years = _years(period)
+    if experiment == 'historical' and years[-1] > 2005:
+        raise ValueError('historical experiment ends in 2005')
+    rlat, rlon, lat, lon = _rotated_coords()
+    # Noise is seeded per year so overlapping periods agree on shared years
+    rngs = [_rng(dataset, {**request, 'period': str(y)}) for y in years]
+
+    if daily:
+        times = _days(years, calendar)
+        season = np.array([
+            np.exp(-((t.dayofyr - 200) / 45.0) ** 2) for t in times
+        ])
+        year_of = np.array([t.year for t in times])
+        climate = np.stack([_climate(lat, y, experiment, offset) for y in years])
+        values = (
+            climate[year_of - years[0]] * (0.2 + 1.6 * season[:, None, None])
+            + np.concatenate([
+                rng.gamma(2.0, 2.0, ((year_of == y).sum(),) + lat.shape)
+                for y, rng in zip(years, rngs)
+            ])
+        )
+    else:
+        times = [cftime.datetime(y, 7, 1, calendar=calendar) for y in years]
+        values = np.stack([
+            _climate(lat, y, experiment, offset) + rng.normal(0.0, 2.0, lat.shape)
+            for y, rng in zip(years, rngs)
+        ])
+    values = np.clip(values, 0.0, None).astype('float32')
+    stride = SETTINGS['stride']
+    values[:, sea_mask()[::stride, ::stride]] = np.nan
+
+    coords = {
+        'time': times,
+        'rlat': rlat,
+        'rlon': rlon,
+        'lat': (('rlat', 'rlon'), lat),
+        'lon': (('rlat', 'rlon'), lon),
+        'rotated_pole': xr.DataArray(0, attrs={
+            'grid_north_pole_latitude': grid.POLE_LATITUDE,
+            'grid_north_pole_longitude': grid.POLE_LONGITUDE,
+        }),
+    }
+    if model is not None:
+        coords['gcm_model'] = model
+    return xr.DataArray(
+        values, dims=('time', 'rlat', 'rlon'), coords=coords,
+        name=request['variable'],
+        attrs={'units': '1', 'long_name': request['variable'].replace('_', ' ')},
+    )
+
+
+def fire_historical(dataset, request):
+    """One year of global 0.25 degree reanalysis FWI."""
+    import xarray as xr
+
+    year = int(request['year'])
+    stride = SETTINGS['stride']
+    lat = np.arange(90.0, -90.25, -0.25)[::stride]
+    lon = np.arange(0.0, 360.0, 0.25)[::stride]
+    times = _days([year], 'standard', request.get('month'), request.get('day'))
+    times = np.array([np.datetime64(t.isoformat(), 'ns') for t in times])
+    rng = _rng(dataset, request)
+    climate = _climate(lat, year, 'historical')[:, None] * np.ones(lon.size)
+    values = climate + rng.gamma(2.0, 2.0, (times.size, lat.size, lon.size))
+    return xr.DataArray(
+        values.astype('float32'), dims=('time', 'lat', 'lon'),
+        coords={'time': times, 'lat': lat, 'lon': lon},
+        name='fwi', attrs={'units': '1', 'long_name': 'fire weather index'},
+    )
+
+
+GENERATORS = {
+    'sis-tourism-fire-danger-indicators': fire_danger_indicators,
+    'cems-fire-historical': fire_historical,
+}
+
+
+def _delay(data):
+    delay = SETTINGS['latency']
+    if SETTINGS['bandwidth']:
+        delay += data.nbytes / SETTINGS['bandwidth']
+    if delay:
+        time.sleep(delay)
+
+
+def provide(dataset, request):
+    from fwi.toolbox import catalogue
+
+    data = catalogue.read(dataset, request, load=GENERATORS[dataset])
+    _delay(data)
+    return data
+
+
+def _tiles(parent_bounds, columns, rows):
+    west, south, east, north = parent_bounds
+    width = (east - west) / columns
+    height = (north - south) / rows
+    for row in range(rows):
+        for column in range(columns):
+            yield (
+                west + column * width, south + row * height,
+                west + (column + 1) * width, south + (row + 1) * height,
+            )
+
+
+def nuts_regions(resolution='default'):
+    """Nested rectangular NUTS 0-3 regions with Eurostat-style identifiers."""
+    import pandas as pd
+    import shapely
+
+    rows = []
+    parents = [('', NUTS_EXTENT)]
+    for level, (columns, nrows) in enumerate(NUTS_SPLITS):
+        children = []
+        for parent_id, bounds in parents:
+            for i, tile in enumerate(_tiles(bounds, columns, nrows)):
+                if level == 0:
+                    nuts_id = chr(65 + i // 26) + chr(65 + i % 26)
+                else:
+                    nuts_id = parent_id + NUTS_CODES[i]
+                children.append((nuts_id, tile))
+                rows.append({
+                    'NUTS_ID': nuts_id,
+                    'LEVL_CODE': level,
+                    'CNTR_CODE': nuts_id[:2],
+                    'NUTS_NAME': f'Region {nuts_id}',
+                    'geometry': shapely.box(*tile),
+                })
+        parents = children
+    return pd.DataFrame(rows)
+
+
+def install(stride=1, latency=0.0, bandwidth=None, seed=0):
+    """Serve the catalogue and NUTS shapes from the synthetic generators."""
+    from fwi import toolbox
+
+    SETTINGS.update(stride=stride, latency=latency, bandwidth=bandwidth, seed=seed)
+    toolbox.install()
+    for dataset in GENERATORS:
+        toolbox.catalogue.register(dataset, provide)
+    toolbox.shapes.register(nuts_regions)
@@ -0,0 +1,37 @@
+"""Local stand-in for the subset of ``cdstoolbox`` used by the scripts.
+
+Data operations run with xarray/NumPy on local NetCDF files, widgets and
+charts are reduced to plain payloads. ``install`` registers this package as
+``cdstoolbox`` so the scripts import it unchanged, and ``load_app`` loads a
+script by path::
+
+    from fwi import toolbox
+
+    app = toolbox.load_app('final/FinalProduct.py')
+    description, heading, livemap = app.application([2041, 2045], 'rcp8_5', 'noresm1_m')
+"""
+import importlib.util
+import os
+import sys
+
+from fwi.toolbox import (
+    catalogue, cdm, chart, cube, geo, input, livemap, orchestrate, output,
+    shapes,
+)
+from fwi.toolbox.app import APPLICATIONS, CHILDREN, Layout, application, child
+
+
+def install():
+    """Make ``import cdstoolbox`` resolve to this backend."""
+    sys.modules['cdstoolbox'] = sys.modules[__name__]
+
+
+def load_app(path):
+    """Install the backend and import the toolbox script at ``path``."""
+    install()
+    name = os.path.splitext(os.path.basename(path))[0].replace(' ', '_')
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,32 @@
+"""Application, child and layout declarations.
+
+The decorators only register the functions by name, so they can be called
+directly or through ``orchestrate.child_service``.
+"""
+APPLICATIONS = {}
+CHILDREN = {}
+
+
+class Layout:
+
+    def __init__(self, rows=1, **kwargs):
+        self.rows = rows
+        self.options = kwargs
+        self.widgets = []
+
+    def add_widget(self, row, content, **kwargs):
+        self.widgets.append(dict(row=row, content=content, **kwargs))
+
+
+def application(**kwargs):
+    def decorator(func):
+        APPLICATIONS[func.__name__] = func
+        return func
+    return decorator
+
+
+def child(**kwargs):
+    def decorator(func):
+        CHILDREN[func.__name__] = func
+        return func
+    return decorator
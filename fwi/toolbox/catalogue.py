@@ -0,0 +1,120 @@
+"""Catalogue retrieval from local NetCDF files.
+
+Files live under ``FWI_DATA_DIR`` (default ``./data``) at the path given by
+the dataset's entry in ``TEMPLATES``. List-valued template fields are
+expanded, one file per value, and concatenated along ``CONCAT_DIMS``; month
+and day lists select within the time axis, and ``area`` ([north, west, south,
+east]) crops rotated or regular grids to that box. ``stream`` serves a
+multi-value request one file at a time. Other sources can be plugged in per
+dataset with ``register``.
+"""
+import os
+import string
+
+import numpy as np
+
+from fwi import grid
+
+
+DATA_DIR = os.environ.get('FWI_DATA_DIR', 'data')
+
+TEMPLATES = {
+    'sis-tourism-fire-danger-indicators': (
+        '{time_aggregation}/{product_type}/{variable}/{gcm_model}/'
+        '{experiment}/{period}.nc'
+    ),
+    'cems-fire-historical': (
+        '{product_type}/{variable}/{version}/{year}.nc'
+    ),
+}
+
+CONCAT_DIMS = {
+    'period': 'time',
+    'year': 'time',
+    'gcm_model': 'gcm_model',
+}
+
+PROVIDERS = {}
+
+
+def register(dataset, provider):
+    """Serve ``dataset`` with ``provider(dataset, request)`` instead of files."""
+    PROVIDERS[dataset] = provider
+
+
+def _fields(template):
+    return [name for _, name, _, _ in string.Formatter().parse(template) if name]
+
+
+def open_file(dataset, request):
+    import xarray as xr
+
+    path = os.path.join(DATA_DIR, dataset, TEMPLATES[dataset].format(**request))
+    return xr.open_dataarray(path).load()
+
+
+def _concat(cubes, field, values):
+    import xarray as xr
+
+    dim = CONCAT_DIMS[field]
+    if dim != 'time':
+        cubes = [
+            cube.expand_dims(dim) if dim in cube.coords
+            else cube.expand_dims({dim: [value]})
+            for cube, value in zip(cubes, values)
+        ]
+    return xr.concat(cubes, dim=dim, coords='minimal', compat='override')
+
+
+def read(dataset, request, load=open_file):
+    """Load ``request`` with one ``load`` call per value of list fields."""
+    fields = _fields(TEMPLATES[dataset])
+    request = dict(request)
+    for field in fields:
+        request.setdefault(field, 'all')
+
+    def expand(request):
+        for field in fields:
+            values = request[field]
+            if isinstance(values, (list, tuple)):
+                cubes = [expand({**request, field: v}) for v in values]
+                return _concat(cubes, field, values)
+        return load(dataset, request)
+
+    data = expand(request)
+    data = select_area(data, request.get('area'))
+    return select_days(data, request.get('month'), request.get('day'))
+
+
+def select_area(data, area=None):
+    if area is None:
+        return data
+    bounds = grid.from_area(area)
+    if 'rlat' in data.dims:
+        return grid.crop_rotated(data, bounds)
+    return grid.crop_regular(data, bounds)
+
+
+def select_days(data, months=None, days=None):
+    if 'time' not in data.dims:
+        return data
+    keep = np.ones(data.sizes['time'], dtype=bool)
+    if months is not None:
+        months = [int(m) for m in np.atleast_1d(months)]
+        keep &= np.isin(data['time'].dt.month.values, months)
+    if days is not None:
+        days = [int(d) for d in np.atleast_1d(days)]
+        keep &= np.isin(data['time'].dt.day.values, days)
+    return data.isel(time=keep) if not keep.all() else data
+
+
+def retrieve(dataset, request):
+    if dataset in PROVIDERS:
+        return PROVIDERS[dataset](dataset, request)
+    return read(dataset, request)
+
+
+def stream(dataset, request, field):
+    """Yield ``request`` one value of its ``field`` list at a time."""
+    for value in request[field]:
+        yield retrieve(dataset, {**request, field: value})
@@ -0,0 +1,34 @@
+"""Common data model helpers: attributes and calendars."""
+import calendar
+import datetime
+
+import numpy as np
+
+
+def get_attributes(data):
+    return dict(data.attrs)
+
+
+def update_attributes(data, attrs):
+    data = data.copy()
+    data.attrs.update(attrs)
+    return data
+
+
+def _to_standard(t):
+    # 360_day and noleap dates such as 30 February are clipped to month end
+    day = min(t.day, calendar.monthrange(t.year, t.month)[1])
+    return np.datetime64(
+        datetime.datetime(t.year, t.month, day, t.hour, t.minute, t.second), 'ns'
+    )
+
+
+def standardise_time(data):
+    """Convert model calendars on the time axis to the standard calendar."""
+    if 'time' not in data.coords:
+        return data
+    values = data['time'].values
+    if np.issubdtype(values.dtype, np.datetime64):
+        return data
+    times = np.array([_to_standard(t) for t in values], dtype='datetime64[ns]')
+    return data.assign_coords(time=times)
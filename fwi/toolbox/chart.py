@@ -0,0 +1,50 @@
+"""Plotly-style figure payloads for line, box and bar charts."""
+import numpy as np
+
+from fwi.toolbox.payload import serialise
+
+
+def _figure(fig, layout_kwargs):
+    if fig is None:
+        fig = {'data': [], 'layout': {}}
+    fig['layout'].update(serialise(layout_kwargs or {}))
+    return fig
+
+
+def _x(data):
+    if not data.dims:
+        return None
+    return serialise(data[data.dims[0]].values) if data.dims[0] in data.coords else None
+
+
+def line(data, layout_kwargs=None, scatter_kwargs=None, fig=None):
+    fig = _figure(fig, layout_kwargs)
+    fig['data'].append({
+        'type': 'scatter',
+        'mode': 'lines',
+        'x': _x(data),
+        'y': serialise(np.ravel(data.values)),
+        **serialise(scatter_kwargs or {}),
+    })
+    return fig
+
+
+def box(data, layout_kwargs=None, box_kwargs=None, fig=None):
+    fig = _figure(fig, layout_kwargs)
+    fig['data'].append({
+        'type': 'box',
+        'y': serialise(np.ravel(data.values)),
+        **serialise(box_kwargs or {}),
+    })
+    return fig
+
+
+def bar(data, layout_kwargs=None, bar_kwargs=None, fig=None):
+    fig = _figure(fig, layout_kwargs)
+    fig['data'].append({
+        'type': 'bar',
+        'x': _x(data),
+        'y': serialise(np.ravel(data.values)),
+        **serialise(bar_kwargs or {}),
+    })
+    return fig
@@ -0,0 +1,34 @@
+"""Cube reductions, selections and concatenation."""
+from fwi.grid import wrap_longitudes
+
+
+def average(data, dim=None):
+    return data.mean(dim=dim, skipna=True, keep_attrs=True)
+
+
+def _ordered_slice(coord, low, high):
+    if coord.size > 1 and coord[0] > coord[-1]:
+        return slice(high, low)
+    return slice(low, high)
+
+
+def select(data, extent=None, start_time=None, stop_time=None, **selectors):
+    """Select by ``extent=[west, east, south, north]``, time range or labels."""
+    if extent is not None:
+        west, east, south, north = extent
+        data = wrap_longitudes(data)
+        data = data.sel(
+            lon=_ordered_slice(data['lon'].values, west, east),
+            lat=_ordered_slice(data['lat'].values, south, north),
+        )
+    if start_time is not None or stop_time is not None:
+        data = data.sel(time=slice(start_time, stop_time))
+    if selectors:
+        data = data.sel(**selectors)
+    return data
+
+
+def concat(data, dim):
+    import xarray as xr
+
+    return xr.concat(list(data), dim=dim, coords='minimal', compat='override')
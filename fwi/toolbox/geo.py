@@ -0,0 +1,19 @@
+"""Regridding of rotated-pole and regular cubes."""
+from fwi import grid, remap
+
+
+def make_regular(data, xref='rlon', yref='rlat', drop_encoding=None):
+    """Bilinear regridding of a rotated-pole cube onto a regular lat/lon grid.
+
+    The regular grid covers the rotated domain at its own resolution, cells
+    outside the domain are NaN.
+    """
+    return remap.local_make_regular(data, xref, yref)
+
+
+def regrid(data, target, method='linear'):
+    """Interpolate a regular cube onto the lat/lon grid of ``target``."""
+    data = grid.wrap_longitudes(data)
+    regridded = data.interp(lat=target['lat'], lon=target['lon'], method=method)
+    regridded.attrs = dict(data.attrs)
+    return regridded
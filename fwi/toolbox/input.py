@@ -0,0 +1,15 @@
+"""Input widgets. Values are passed as plain arguments when running locally."""
+
+
+def _widget(name, **kwargs):
+    def decorator(func):
+        return func
+    return decorator
+
+
+def slider(name, **kwargs):
+    return _widget(name, **kwargs)
+
+
+def dropdown(name, **kwargs):
+    return _widget(name, **kwargs)
@@ -0,0 +1,6 @@
+"""Live map payloads."""
+from fwi.toolbox.payload import serialise
+
+
+def plot(data_layers, **kwargs):
+    return {'layers': serialise(list(data_layers)), **serialise(kwargs)}
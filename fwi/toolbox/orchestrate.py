@@ -0,0 +1,6 @@
+from fwi.toolbox.app import CHILDREN
+
+
+def child_service(name, args=None):
+    """Run the child registered as ``name`` in the current process."""
+    return CHILDREN[name](**(args or {}))
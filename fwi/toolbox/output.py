@@ -0,0 +1,19 @@
+"""Output widgets. Functions return their outputs directly when running locally."""
+
+
+def _output(**kwargs):
+    def decorator(func):
+        return func
+    return decorator
+
+
+def markdown(**kwargs):
+    return _output(**kwargs)
+
+
+def livefigure(**kwargs):
+    return _output(**kwargs)
+
+
+def livemap(**kwargs):
+    return _output(**kwargs)
@@ -0,0 +1,31 @@
+"""Conversion of cubes and nested structures to JSON-ready payloads."""
+import numpy as np
+
+
+def _values(array):
+    values = np.asarray(array)
+    if np.issubdtype(values.dtype, np.datetime64):
+        return np.datetime_as_string(values, unit='D').tolist()
+    if np.issubdtype(values.dtype, np.floating):
+        return np.where(np.isfinite(values), values, None).tolist()
+    return values.tolist()
+
+
+def serialise(obj):
+    """Turn cubes (and containers of cubes) into JSON-ready structures."""
+    if hasattr(obj, 'dims') and hasattr(obj, 'values'):
+        return {
+            'dims': list(obj.dims),
+            'coords': {dim: _values(obj[dim].values) for dim in obj.dims if dim in obj.coords},
+            'values': _values(obj.values),
+            'attrs': serialise(dict(obj.attrs)),
+        }
+    if isinstance(obj, dict):
+        return {key: serialise(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [serialise(value) for value in obj]
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return _values(obj)
+    return obj
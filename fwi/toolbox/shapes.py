@@ -0,0 +1,83 @@
+"""NUTS shapes from local Eurostat GeoJSON files and zonal averages.
+
+Regions are plain ``pandas.DataFrame`` objects with the Eurostat columns
+(``NUTS_ID``, ``LEVL_CODE``, ``NUTS_NAME``, ...) and a ``geometry`` column
+of shapely geometries. ``register`` replaces the files with another source.
+"""
+import functools
+import json
+import os
+from types import SimpleNamespace
+
+from fwi import zonal
+from fwi.toolbox import catalogue as _catalogue
+
+
+NUTS_FILES = {
+    'high': 'NUTS_RG_01M_2016_4326.geojson',
+    'default': 'NUTS_RG_20M_2016_4326.geojson',
+}
+
+SOURCES = {}
+
+
+def register(source):
+    """Serve NUTS regions of every level with ``source(resolution)``."""
+    SOURCES['nuts'] = source
+
+
+@functools.lru_cache(maxsize=None)
+def read_regions(path):
+    import pandas as pd
+    import shapely.geometry
+
+    with open(path) as f:
+        features = json.load(f)['features']
+    return pd.DataFrame([
+        {
+            **feature['properties'],
+            'geometry': shapely.geometry.shape(feature['geometry']),
+        }
+        for feature in features
+    ])
+
+
+def nuts(level=3, resolution='default', nuts_id=None):
+    if 'nuts' in SOURCES:
+        regions = SOURCES['nuts'](resolution)
+    else:
+        path = os.path.join(_catalogue.DATA_DIR, 'nuts', NUTS_FILES[resolution])
+        regions = read_regions(path)
+    regions = regions[regions['LEVL_CODE'] == level]
+    if nuts_id is not None:
+        regions = regions[regions['NUTS_ID'].isin(list(nuts_id))]
+    return regions.reset_index(drop=True)
+
+
+catalogue = SimpleNamespace(nuts=nuts)
+
+
+def average(data, nuts, all_touched=False):
+    return zonal.local_average(data, nuts, all_touched=all_touched)
+
+
+def get(collection, name):
+    return {'collection': collection, 'name': name}
+
+
+def get_geojson(regions):
+    import shapely.geometry
+
+    return {
+        'type': 'FeatureCollection',
+        'features': [
+            {
+                'type': 'Feature',
+                'properties': {
+                    key: value for key, value in row.items() if key != 'geometry'
+                },
+                'geometry': shapely.geometry.mapping(row['geometry']),
+            }
+            for row in regions.to_dict('records')
+        ],
+    }
@@ -0,0 +1,207 @@
+"""Nested timing spans for the scripts and the toolbox calls they make.
+
+Tracing is off until ``enable(path)`` is called or ``FWI_TRACE_FILE`` is set.
+Functions decorated with ``traced`` and every ``ct.*`` call listed in
+``CALLS`` then open a span carrying wall time, bytes in and out and, for
+cached calls, whether the cache was hit. When an outermost span (one request)
+finishes, its spans are appended to the trace file as JSON lines and a
+flame-style summary is appended to the matching ``.report.txt`` file.
+"""
+import collections
+import contextlib
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+
+
+CALLS = {
+    'catalogue': ['retrieve'],
+    'geo': ['make_regular', 'regrid'],
+    'cdm': ['standardise_time', 'update_attributes', 'get_attributes'],
+    'cube': ['average', 'select', 'concat'],
+    'shapes': ['average', 'get', 'get_geojson'],
+    'shapes.catalogue': ['nuts'],
+    'chart': ['line', 'box', 'bar'],
+    'livemap': ['plot'],
+    'orchestrate': ['child_service'],
+}
+
+_state = {'path': os.environ.get('FWI_TRACE_FILE'), 'instrumented': False}
+_current = contextvars.ContextVar('fwi_span', default=None)
+_lock = threading.Lock()
+
+
+class Span:
+
+    def __init__(self, name, parent=None, attrs=None):
+        self.name = name
+        self.parent = parent
+        self.attrs = dict(attrs or {})
+        self.children = []
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex[:16]
+        self.span_id = uuid.uuid4().hex[:16]
+        self.thread = threading.current_thread().name
+        self.start = time.time()
+        self.wall = 0.0
+        if parent is not None:
+            parent.children.append(self)
+
+    def walk(self):
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+    def to_dict(self):
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent.span_id if self.parent else None,
+            'name': self.name,
+            'start': self.start,
+            'wall': self.wall,
+            'thread': self.thread,
+            'attrs': self.attrs,
+        }
+
+
+def enabled():
+    return _state['path'] is not None
+
+
+def enable(path):
+    """Trace to the JSON lines file at ``path`` and instrument ``ct.*``."""
+    _state['path'] = path
+    _instrument()
+
+
+def disable():
+    _state['path'] = None
+
+
+def nbytes(obj):
+    if hasattr(obj, 'nbytes'):
+        return int(obj.nbytes)
+    if isinstance(obj, dict):
+        return sum(nbytes(value) for value in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return sum(nbytes(value) for value in obj)
+    return 0
+
+
+def annotate(**attrs):
+    """Add attributes to the innermost open span, if any."""
+    current = _current.get()
+    if current is not None:
+        current.attrs.update(attrs)
+
+
+@contextlib.contextmanager
+def span(name, **attrs):
+    if not enabled():
+        yield None
+        return
+    parent = _current.get()
+    if parent is None:
+        _instrument()
+    current = Span(name, parent, attrs)
+    token = _current.set(current)
+    start = time.perf_counter()
+    try:
+        yield current
+    except BaseException as e:
+        current.attrs['error'] = repr(e)
+        raise
+    finally:
+        current.wall = time.perf_counter() - start
+        _current.reset(token)
+        if parent is None:
+            export(current)
+
+
+def traced(func=None, name=None):
+    """Run ``func`` in a span recording its bytes in and out."""
+    if func is None:
+        return functools.partial(traced, name=name)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not enabled():
+            return func(*args, **kwargs)
+        with span(name or func.__name__, bytes_in=nbytes((args, kwargs))) as current:
+            result = func(*args, **kwargs)
+            current.attrs['bytes_out'] = nbytes(result)
+            return result
+
+    wrapper.traced = True
+    return wrapper
+
+
+def instrument(ct):
+    """Wrap the toolbox calls listed in ``CALLS`` with spans, in place."""
+    for namespace, names in CALLS.items():
+        obj = ct
+        for part in namespace.split('.'):
+            obj = getattr(obj, part, None)
+        for name in names:
+            func = getattr(obj, name, None)
+            if func is None or getattr(func, 'traced', False):
+                continue
+            setattr(obj, name, traced(func, name=f'ct.{namespace}.{name}'))
+
+
+def _instrument():
+    if _state['instrumented']:
+        return
+    try:
+        import cdstoolbox
+    except ImportError:
+        return
+    instrument(cdstoolbox)
+    _state['instrumented'] = True
+
+
+def report(root):
+    """Flame-style summary of a trace, merging sibling spans by name."""
+    total = root.wall or 1e-9
+    lines = [f'trace {root.trace_id} {root.name} {root.wall:.3f} s']
+
+    def walk(spans, depth):
+        groups = collections.OrderedDict()
+        for s in spans:
+            groups.setdefault(s.name, []).append(s)
+        for name, group in groups.items():
+            wall = sum(s.wall for s in group)
+            children = [child for s in group for child in s.children]
+            # Children running on other threads can add up to more than wall
+            self_time = max(wall - sum(child.wall for child in children), 0.0)
+            label = name if len(group) == 1 else f'{name} x{len(group)}'
+            cache = collections.Counter(
+                s.attrs['cache'] for s in group if 'cache' in s.attrs
+            )
+            extra = ' '.join(f'{key}={count}' for key, count in sorted(cache.items()))
+            out = sum(s.attrs.get('bytes_out', 0) for s in group)
+            lines.append(
+                f"{'  ' * depth}{label:<{48 - 2 * depth}} {'#' * round(30 * min(wall / total, 1.0)):<30} "
+                f'{wall:9.3f} s {100 * wall / total:6.1f}% self {self_time:8.3f} s '
+                f'out {out / 2 ** 20:9.1f} MiB {extra}'.rstrip()
+            )
+            walk(children, depth + 1)
+
+    walk([root], 0)
+    return '\n'.join(lines) + '\n'
+
+
+def export(root):
+    path = _state['path']
+    if path is None:
+        return
+    with _lock:
+        with open(path, 'a') as f:
+            for s in root.walk():
+                f.write(json.dumps(s.to_dict(), default=str) + '\n')
+        with open(os.path.splitext(path)[0] + '.report.txt', 'a') as f:
+            f.write(report(root) + '\n')
@@ -0,0 +1,156 @@
+"""Prefix-sum store of yearly regional totals.
+
+For one (variable, model, scenario) the store keeps, per year and region, the
+sum and count of daily values, together with their cumulative sums over
+years, and the area of each region when the values carry one. The mean over
+any year range is then two lookups and a subtraction, whatever the number of
+years. Years are filled on demand from a ``totals(year)`` callback and the
+store is saved under ``FWI_CACHE_DIR`` in a file named after
+``STORE_VERSION``, so stores of an older layout are rebuilt.
+"""
+import os
+import tempfile
+import threading
+
+import numpy as np
+
+from fwi.cache import CACHE_DIR
+from fwi.parallel import ordered_map
+
+
+YEARLY_DIR = os.path.join(CACHE_DIR, 'yearly')
+
+# Bump when the saved layout changes (2: region areas, for rolling up)
+STORE_VERSION = 2
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+class YearlyStore:
+
+    def __init__(self, name, first_year, last_year, directory=None):
+        self.name = name
+        self.first_year = first_year
+        self.last_year = last_year
+        self.path = os.path.join(
+            directory or YEARLY_DIR, f'{name}-v{STORE_VERSION}.npz',
+        )
+        self.ids = None
+        nyears = last_year - first_year + 1
+        self.filled = np.zeros(nyears, dtype=bool)
+        self.sums = None
+        self.counts = None
+        self.prefix_sums = None
+        self.prefix_counts = None
+        self.areas = None
+        self._lock = threading.Lock()
+        if os.path.exists(self.path):
+            self._load()
+
+    def _load(self):
+        with np.load(self.path) as f:
+            self.ids = f['ids'].tolist()
+            self.filled = f['filled']
+            self.sums = f['sums']
+            self.counts = f['counts']
+            if 'areas' in f:
+                self.areas = f['areas']
+        self._accumulate()
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path), suffix='.tmp')
+        extra = {} if self.areas is None else {'areas': self.areas}
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(
+                f, ids=np.asarray(self.ids), filled=self.filled,
+                sums=self.sums, counts=self.counts, **extra,
+            )
+        os.replace(tmp_path, self.path)
+
+    def _accumulate(self):
+        zeros = np.zeros((1, len(self.ids)))
+        self.prefix_sums = np.concatenate([zeros, np.cumsum(self.sums, axis=0)])
+        self.prefix_counts = np.concatenate([zeros, np.cumsum(self.counts, axis=0)])
+
+    def _index(self, year):
+        if not self.first_year <= year <= self.last_year:
+            raise ValueError(
+                f'{year} is outside {self.first_year}-{self.last_year}'
+            )
+        return year - self.first_year
+
+    def missing(self, start, stop):
+        return [
+            year for year in range(start, stop + 1)
+            if not self.filled[self._index(year)]
+        ]
+
+    def add(self, year, ids, sums, counts, areas=None):
+        """Record the totals of ``year``, one value per region in ``ids``."""
+        ids = [str(i) for i in ids]
+        with self._lock:
+            if self.ids != ids:
+                # A new set of regions invalidates everything stored so far
+                self.ids = ids
+                self.filled[:] = False
+                self.sums = np.zeros((self.filled.size, len(ids)))
+                self.counts = np.zeros((self.filled.size, len(ids)))
+            i = self._index(year)
+            self.sums[i] = np.nan_to_num(sums)
+            self.counts[i] = counts
+            if areas is not None:
+                self.areas = np.asarray(areas, dtype='float64')
+            self.filled[i] = True
+            self._accumulate()
+
+    def fill(self, start, stop, totals):
+        """Compute and save the missing years of ``start..stop``."""
+        missing = self.missing(start, stop)
+        if not missing:
+            return
+        for year, result in zip(missing, ordered_map(totals, missing)):
+            self.add(year, *result)
+        with self._lock:
+            self._save()
+
+    def mean(self, start, stop):
+        """Mean over ``start..stop`` (inclusive) as a ``nuts`` cube."""
+        import xarray as xr
+
+        missing = self.missing(start, stop)
+        if missing:
+            raise KeyError(f'{self.name} has no totals for {missing}')
+        i, j = self._index(start), self._index(stop) + 1
+        with self._lock:
+            sums = self.prefix_sums[j] - self.prefix_sums[i]
+            counts = self.prefix_counts[j] - self.prefix_counts[i]
+            ids = self.ids
+            areas = self.areas
+        with np.errstate(invalid='ignore', divide='ignore'):
+            values = np.where(counts > 0, sums / counts, np.nan)
+        coords = {'nuts': ids}
+        if areas is not None:
+            coords['area'] = ('nuts', areas)
+        return xr.DataArray(values, dims=('nuts',), coords=coords)
+
+
+def get_store(name, first_year, last_year):
+    """Shared store instance for ``name``."""
+    with _stores_lock:
+        if name not in _stores:
+            _stores[name] = YearlyStore(name, first_year, last_year)
+        return _stores[name]
+
+
+def totals(data, dim='time'):
+    """Per-region sums, counts of valid values and areas of a ``nuts`` cube."""
+    values = data.transpose(dim, 'nuts').values
+    valid = np.isfinite(values)
+    return (
+        data['nuts'].values.tolist(),
+        np.where(valid, values, 0.0).sum(axis=0),
+        valid.sum(axis=0),
+        data['area'].values if 'area' in data.coords else None,
+    )
@@ -0,0 +1,320 @@
+"""NUTS zonal means from precomputed sparse area weights.
+
+``ct.shapes.average`` intersects every polygon with the grid on each call.
+Here the intersection is done once per (grid, regions, mode) and stored under
+``FWI_CACHE_DIR`` as a sparse regions x cells matrix of cell-area weights, so
+each regional mean becomes one sparse product batched over every other
+dimension (gcm_model, time, experiment, ...).
+
+As in rasterio, a cell belongs to a region when its centre lies inside the
+polygon, or with ``all_touched=True`` whenever the cell intersects it.
+
+``rotated_average`` does the same on the native rotated-pole grid, with cell
+centres and outlines taken back to geographic coordinates, so paths that
+only need NUTS values skip ``make_regular``.
+"""
+import hashlib
+import io
+import os
+import tempfile
+import threading
+
+import numpy as np
+
+from fwi import grid, tracing
+from fwi.cache import CACHE_DIR
+
+
+ZONAL_DIR = os.path.join(CACHE_DIR, 'zonal')
+
+_weights = {}
+_lock = threading.Lock()
+
+
+def cell_edges(centres):
+    centres = np.asarray(centres, dtype='float64')
+    if centres.size == 1:
+        return np.array([centres[0] - 0.5, centres[0] + 0.5])
+    mid = (centres[1:] + centres[:-1]) / 2
+    first = 2 * centres[0] - mid[0]
+    last = 2 * centres[-1] - mid[-1]
+    return np.concatenate([[first], mid, [last]])
+
+
+def _fingerprint(*arrays):
+    h = hashlib.sha256()
+    for a in arrays:
+        a = np.ascontiguousarray(a)
+        h.update(str((a.dtype, a.shape)).encode('utf-8'))
+        h.update(a.tobytes())
+    return h.hexdigest()[:16]
+
+
+def grid_fingerprint(lat, lon):
+    return _fingerprint(np.asarray(lat, 'float64'), np.asarray(lon, 'float64'))
+
+
+def regions_fingerprint(ids, geometries):
+    import shapely
+
+    bounds = shapely.bounds(np.asarray(geometries))
+    return _fingerprint(np.asarray(ids, dtype=str), bounds)
+
+
+def build_weights(lat, lon, geometries, all_touched=False):
+    """Sparse (regions x lat*lon) matrix of cell areas inside each region."""
+    import shapely
+    from scipy import sparse
+
+    lat = np.asarray(lat, dtype='float64')
+    lon = np.asarray(lon, dtype='float64')
+    lat_edges = cell_edges(lat)
+    lon_edges = cell_edges(lon)
+    lat_lo = np.minimum(lat_edges[:-1], lat_edges[1:])
+    lat_hi = np.maximum(lat_edges[:-1], lat_edges[1:])
+    lon_lo = np.minimum(lon_edges[:-1], lon_edges[1:])
+    lon_hi = np.maximum(lon_edges[:-1], lon_edges[1:])
+    area = np.outer(
+        np.cos(np.deg2rad(lat)) * (lat_hi - lat_lo), lon_hi - lon_lo
+    )
+
+    rows, cols, vals = [], [], []
+    for i, geom in enumerate(geometries):
+        if geom is None or geom.is_empty:
+            continue
+        minx, miny, maxx, maxy = geom.bounds
+        ilat = np.nonzero((lat_hi >= miny) & (lat_lo <= maxy))[0]
+        ilon = np.nonzero((lon_hi >= minx) & (lon_lo <= maxx))[0]
+        if not ilat.size or not ilon.size:
+            continue
+        jj, ii = np.meshgrid(ilon, ilat)
+        shapely.prepare(geom)
+        if all_touched:
+            boxes = shapely.box(lon_lo[jj], lat_lo[ii], lon_hi[jj], lat_hi[ii])
+            inside = shapely.intersects(geom, boxes)
+        else:
+            inside = shapely.contains_xy(geom, lon[jj], lat[ii])
+        ii, jj = ii[inside], jj[inside]
+        rows.append(np.full(ii.size, i))
+        cols.append(ii * lon.size + jj)
+        vals.append(area[ii, jj])
+
+    if rows:
+        rows, cols, vals = (np.concatenate(a) for a in (rows, cols, vals))
+    return sparse.csr_matrix(
+        (vals, (rows, cols)), shape=(len(geometries), lat.size * lon.size)
+    )
+
+
+def build_rotated_weights(rlat, rlon, pole, geometries, all_touched=False):
+    """Sparse (regions x rlat*rlon) matrix of rotated cell areas in each region."""
+    import shapely
+    from scipy import sparse
+
+    rlat = np.asarray(rlat, dtype='float64')
+    rlon = np.asarray(rlon, dtype='float64')
+    rlat_edges = cell_edges(rlat)
+    rlon_edges = cell_edges(rlon)
+    # The rotation preserves areas, so rotated cell areas are the true ones
+    area = np.outer(
+        np.cos(np.deg2rad(rlat)) * np.abs(np.diff(rlat_edges)),
+        np.abs(np.diff(rlon_edges)),
+    ).ravel()
+
+    if all_touched:
+        lat, lon = grid.unrotate(
+            *np.meshgrid(rlat_edges, rlon_edges, indexing='ij'), *pole
+        )
+        corners = [
+            (lon[:-1, :-1], lat[:-1, :-1]), (lon[:-1, 1:], lat[:-1, 1:]),
+            (lon[1:, 1:], lat[1:, 1:]), (lon[1:, :-1], lat[1:, :-1]),
+        ]
+        rings = np.stack(
+            [np.stack([x.ravel(), y.ravel()], axis=-1) for x, y in corners],
+            axis=1,
+        )
+        cells = shapely.polygons(rings)
+        predicate = 'intersects'
+    else:
+        lat, lon = grid.unrotate(*np.meshgrid(rlat, rlon, indexing='ij'), *pole)
+        cells = shapely.points(lon.ravel(), lat.ravel())
+        predicate = 'contains'
+
+    tree = shapely.STRtree(cells)
+    rows, cols = tree.query(np.asarray(geometries), predicate=predicate)
+    return sparse.csr_matrix(
+        (area[cols], (rows, cols)), shape=(len(geometries), area.size)
+    )
+
+
+def _save(path, weights):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    buffer = io.BytesIO()
+    np.savez(
+        buffer, data=weights.data, indices=weights.indices,
+        indptr=weights.indptr, shape=weights.shape,
+    )
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(buffer.getvalue())
+    os.replace(tmp_path, path)
+
+
+def _load(path):
+    from scipy import sparse
+
+    with np.load(path) as f:
+        return sparse.csr_matrix(
+            (f['data'], f['indices'], f['indptr']), shape=tuple(f['shape'])
+        )
+
+
+def cached_weights(key, build, directory=None):
+    """Weights for ``key`` from memory, then disk, else from ``build()``."""
+    with _lock:
+        if key in _weights:
+            return _weights[key]
+    path = os.path.join(directory or ZONAL_DIR, key + '.npz')
+    if os.path.exists(path):
+        weights = _load(path)
+    else:
+        weights = build()
+        _save(path, weights)
+    with _lock:
+        _weights[key] = weights
+    return weights
+
+
+def get_weights(lat, lon, ids, geometries, all_touched=False):
+    key = '-'.join([
+        grid_fingerprint(lat, lon),
+        regions_fingerprint(ids, geometries),
+        'touched' if all_touched else 'centre',
+    ])
+    return cached_weights(
+        key, lambda: build_weights(lat, lon, geometries, all_touched)
+    )
+
+
+def get_rotated_weights(rlat, rlon, pole, ids, geometries, all_touched=False):
+    key = '-'.join([
+        'rotated',
+        grid_fingerprint(rlat, rlon),
+        grid_fingerprint(*pole),
+        regions_fingerprint(ids, geometries),
+        'touched' if all_touched else 'centre',
+    ])
+    return cached_weights(
+        key,
+        lambda: build_rotated_weights(rlat, rlon, pole, geometries, all_touched),
+    )
+
+
+def apply_weights(data, weights, ids, spatial_dims):
+    """Weighted means of ``data`` over ``spatial_dims`` as a ``nuts`` cube."""
+    other = [d for d in data.dims if d not in spatial_dims]
+    values = data.transpose(*spatial_dims, *other).values
+    flat = values.reshape(weights.shape[1], -1)
+    valid = np.isfinite(flat)
+    totals = weights @ np.where(valid, flat, 0.0)
+    norms = weights @ valid.astype('float64')
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = totals / norms
+    mean = mean.reshape((len(ids),) + values.shape[len(spatial_dims):])
+    # Area of each region's valid cells, for rolling regions up
+    areas = norms.max(axis=1, initial=0.0)
+    return nuts_cube(data, mean, ids, spatial_dims, areas)
+
+
+def nuts_cube(data, values, ids, spatial_dims, areas=None):
+    """``nuts`` cube of per-region ``values`` keeping the other dims of ``data``."""
+    import xarray as xr
+
+    other = [d for d in data.dims if d not in spatial_dims]
+    coords = {
+        name: coord for name, coord in data.coords.items()
+        if not set(coord.dims) & set(spatial_dims)
+    }
+    coords['nuts'] = list(ids)
+    if areas is not None:
+        coords['area'] = ('nuts', np.asarray(areas, dtype='float64'))
+    result = xr.DataArray(
+        values, dims=('nuts', *other), coords=coords,
+        name=data.name, attrs=data.attrs,
+    )
+    return result.transpose(*other, 'nuts')
+
+
+def _is_local(data, nuts):
+    return hasattr(data, 'dims') and hasattr(nuts, 'geometry')
+
+
+def bounds(nuts):
+    """(west, south, east, north) of local regions, None for toolbox shapes."""
+    if not hasattr(nuts, 'geometry') or not len(nuts):
+        return None
+    import shapely
+
+    west, south, east, north = shapely.total_bounds(np.asarray(nuts.geometry))
+    return float(west), float(south), float(east), float(north)
+
+
+def with_names(data, nuts):
+    """``data`` with the ``NUTS_NAME`` of each of its ``nuts`` from ``nuts``."""
+    if 'NUTS_NAME' not in nuts:
+        return data
+    names = dict(zip(
+        (str(nuts_id) for nuts_id in nuts['NUTS_ID']), nuts['NUTS_NAME'],
+    ))
+    ids = [str(nuts_id) for nuts_id in data['nuts'].values]
+    return data.assign_coords(NUTS_NAME=('nuts', [names.get(i, i) for i in ids]))
+
+
+@tracing.traced(name='zonal.average')
+def average(data, nuts, all_touched=False):
+    """Drop-in for ``ct.shapes.average`` on regular lat/lon cubes.
+
+    Cubes that are not local xarray objects are passed on to the toolbox.
+    """
+    if not _is_local(data, nuts):
+        import cdstoolbox as ct
+
+        kwargs = {'all_touched': True} if all_touched else {}
+        return ct.shapes.average(data, nuts, **kwargs)
+    return local_average(data, nuts, all_touched)
+
+
+def local_average(data, nuts, all_touched=False):
+    ids = [str(nuts_id) for nuts_id in nuts['NUTS_ID']]
+    geometries = np.asarray(nuts.geometry)
+    weights = get_weights(
+        data['lat'].values, data['lon'].values, ids, geometries, all_touched,
+    )
+    result = apply_weights(data, weights, ids, ('lat', 'lon'))
+    return with_names(result, nuts)
+
+
+@tracing.traced(name='zonal.rotated_average')
+def rotated_average(data, nuts, all_touched=False, xref='rlon', yref='rlat'):
+    """NUTS means of a rotated-pole cube without regridding it.
+
+    Cubes that are not local xarray objects are regridded with
+    ``make_regular`` and averaged by the toolbox.
+    """
+    if not _is_local(data, nuts):
+        from fwi import remap
+
+        data = remap.make_regular(data, xref=xref, yref=yref,
+                                  drop_encoding=[xref, yref])
+        return average(data, nuts, all_touched)
+    ids = [str(nuts_id) for nuts_id in nuts['NUTS_ID']]
+    weights = get_rotated_weights(
+        data[yref].values, data[xref].values, grid.pole_of(data),
+        ids, np.asarray(nuts.geometry), all_touched,
+    )
+    result = apply_weights(data, weights, ids, (yref, xref))
+    result = result.drop_vars(
+        [name for name in ('rotated_pole', 'rotated_latitude_longitude')
+         if name in result.coords]
+    )
+    return with_names(result, nuts)
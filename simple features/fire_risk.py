@@ -1,7 +1,16 @@
 import cdstoolbox as ct
 
+from fwi import climatology, grid, pipeline, streaming, zonal
+from fwi.cache import retrieve
+from fwi.tracing import traced
+
 
 REANALYSIS_PERIOD = (1981, 2005)
+REANALYSIS_VERSION = '3.1'
+EUROPE_EXTENT = [-25, 46, 32, 72]
+
+# Written in the natural order; run with the time mean before regridding
+SEASONAL_MEAN = pipeline.Pipeline([pipeline.make_regular(), pipeline.time_mean()])
 
 DESCRIPTION = (
     '### The Fire Weather Index (FWI) system provides fire danger information '
@@ -140,9 +149,9 @@ NO_DATA = [
 
 
 @ct.child()
-def intermediate(time, scenario, model, compare):
+def intermediate(time, scenario, model, compare, nuts_id=None):
 
-    data = get_child_data(time, scenario, model, compare)
+    data = get_child_data(time, scenario, model, compare, nuts_id)
 
     return data
 
@@ -173,7 +182,8 @@ def fwi_future_child(params, time, scenario, model, compare):
             time=time,
             scenario=scenario,
             model=model,
-            compare=compare
+            compare=compare,
+            nuts_id=nuts_id,
         ),
     )
 
@@ -286,7 +296,7 @@ def application(time, scenario,model='mean',product_type='model'):
     data = get_seasonal_fwi_data(time, scenario, model)
     nuts = ct.shapes.catalogue.nuts(level=3, resolution='high')
 
-    nuts_avg = ct.shapes.average(data, nuts, all_touched=True)
+    nuts_avg = zonal.average(data, nuts, all_touched=True)
 
 
 
@@ -361,114 +371,150 @@ def application(time, scenario,model='mean',product_type='model'):
     return DESCRIPTION, HEADING_1, fig
 
 
-def get_seasonal_fwi_data(time, scenario, model_statistic, bias=False):
+def get_seasonal_fwi_data(time, scenario, model_statistic, bias=False, bounds=None,
+                          regular=True):
 
-    data = ct.catalogue.retrieve(
-        'sis-tourism-fire-danger-indicators',
-        {
-            'time_aggregation': 'seasonal_indicators',
-            'product_type': f'multi_model_{model_statistic}_case',
-            'variable': 'seasonal_fire_weather_index',
-            'experiment': scenario.lower(),
-            'period': time,
-        }
-    )
-    data = ct.geo.make_regular(data, xref='rlon', yref='rlat',
-                               drop_encoding=['rlon', 'rlat'])
-    data = ct.cube.average(data, dim='time')
+    request = {
+        'time_aggregation': 'seasonal_indicators',
+        'product_type': f'multi_model_{model_statistic}_case',
+        'variable': 'seasonal_fire_weather_index',
+        'experiment': scenario.lower(),
+        'period': time,
+    }
+    if bounds is not None:
+        request['area'] = grid.to_area(bounds)
+    data = retrieve('sis-tourism-fire-danger-indicators', request)
+    if bounds is not None:
+        data = grid.crop_rotated(data, bounds)
+    if not regular:
+        # NUTS-only callers average the native rotated grid
+        return ct.cube.average(data, dim='time')
+    data = SEASONAL_MEAN(data)
 
 
     return data
 
 
-def get_reanalysis():
-    yearly_data = []
-    for year in REANALYSIS_PERIOD:
-        data = ct.catalogue.retrieve(
-            'cems-fire-historical',
-            {
-                'product_type': 'reanalysis',
-                'variable': 'fire_weather_index',
-                'version': '3.1',
-                'dataset': 'Consolidated dataset',
-                'year': str(year),
-                'month': [
-                    '06', '07', '08',
-                    '09',
-                ],
-                'day': [
-                    '01', '02', '03',
-                    '04', '05', '06',
-                    '07', '08', '09',
-                    '10', '11', '12',
-                    '13', '14', '15',
-                    '16', '17', '18',
-                    '19', '20', '21',
-                    '22', '23', '24',
-                    '25', '26', '27',
-                    '28', '29', '30',
-                    '31',
-                ],
-            }
-        )
-        data = ct.cube.average(data, dim='time')
-        yearly_data.append(data)
-    data = ct.cube.concat(yearly_data, dim='time')
-    data = ct.cube.average(data, dim='time')
-    data = ct.cube.select(data, [-25, 46, 32, 72])
+@traced
+def get_reanalysis(version=REANALYSIS_VERSION):
+    # The climatology is fixed for a dataset version, so it is built only once
+    return climatology.get(
+        'reanalysis-fwi-jjas', lambda: compute_reanalysis(version),
+        version=version, period=REANALYSIS_PERIOD, extent=EUROPE_EXTENT,
+    )
+
+
+@traced
+def get_nuts_reanalysis(version=REANALYSIS_VERSION):
+    nuts = ct.shapes.catalogue.nuts(level=3)
+    return climatology.get(
+        'reanalysis-fwi-jjas-nuts3',
+        lambda: zonal.average(get_reanalysis(version), nuts, all_touched=True),
+        version=version, period=REANALYSIS_PERIOD, extent=EUROPE_EXTENT,
+        regions=climatology.regions_tag(nuts),
+    )
+
+
+def compute_reanalysis(version=REANALYSIS_VERSION):
+    # One request for the whole period, reduced one year at a time
+    data = streaming.mean_of_yearly_means(
+        'cems-fire-historical',
+        {
+            'product_type': 'reanalysis',
+            'variable': 'fire_weather_index',
+            'version': version,
+            'dataset': 'Consolidated dataset',
+            'year': [
+                str(year) for year in
+                range(REANALYSIS_PERIOD[0], REANALYSIS_PERIOD[1] + 1)
+            ],
+            'month': [
+                '06', '07', '08',
+                '09',
+            ],
+            'day': [
+                '01', '02', '03',
+                '04', '05', '06',
+                '07', '08', '09',
+                '10', '11', '12',
+                '13', '14', '15',
+                '16', '17', '18',
+                '19', '20', '21',
+                '22', '23', '24',
+                '25', '26', '27',
+                '28', '29', '30',
+                '31',
+            ],
+        }
+    )
+    data = ct.cube.select(data, EUROPE_EXTENT)
     return data
 
 
-def get_child_data(time, scenario, model, compare):
+def get_child_data(time, scenario, model, compare, nuts_id=None):
 
     child_data = []
 
+    # A clicked region only needs the cells of its bounding box
+    nuts = get_regions(nuts_id)
+    bounds = zonal.bounds(nuts) if nuts_id is not None else None
+
     data = None
     if compare != 'rcps':
-        nuts = ct.shapes.catalogue.nuts(level=3)
-        reanalysis_data = get_reanalysis()
-        reanalysis_data = ct.shapes.average(reanalysis_data, nuts, all_touched=True)
+        reanalysis_data = get_nuts_reanalysis()
+        if nuts_id is not None:
+            reanalysis_data = ct.cube.select(reanalysis_data, nuts=[nuts_id])
         
         if compare == 'models':
             
-            data = get_seasonal_fwi_data(time, scenario, model)
-            current_climate = get_seasonal_fwi_data('1981_2005', 'historical', 'mean')
+            data = get_seasonal_fwi_data(
+                time, scenario, model, bounds=bounds, regular=False)
+            current_climate = get_seasonal_fwi_data(
+                '1981_2005', 'historical', 'mean', bounds=bounds, regular=False)
             anomaly = data - current_climate
 
-            anomaly = ct.shapes.average(anomaly, nuts, all_touched=True)
+            anomaly = zonal.rotated_average(anomaly, nuts, all_touched=True)
             reanalysis_data = reanalysis_data + anomaly
         child_data = [reanalysis_data]
 
     if compare == 'models':
         for model in MODELS:
             model = model['value']
-            data = get_nuts_data(time, scenario, model)
+            data = get_nuts_data(time, scenario, model, nuts_id=nuts_id)
             child_data.append(data)
     
     elif compare == 'horizons':
         for time in TIMES:
             time = time['value']
-            data = get_nuts_data(time, scenario, model)
+            data = get_nuts_data(time, scenario, model, nuts_id=nuts_id)
             child_data.append(data)
     
     elif compare == 'rcps':
         for scenario in RCPS:
             scenario = scenario['value']
-            data = get_nuts_data(time, scenario, model)
+            data = get_nuts_data(time, scenario, model, nuts_id=nuts_id)
             child_data.append(data)
 
     return child_data
 
 
-def get_nuts_data(time, scenario, model, bias=False):
+def get_nuts_data(time, scenario, model, bias=False, nuts_id=None):
 
-    nuts = ct.shapes.catalogue.nuts(level=3)
-    data= get_seasonal_fwi_data(time, scenario, model, bias=bias)
-    nuts_avg = ct.shapes.average(data, nuts)
+    nuts = get_regions(nuts_id)
+    bounds = zonal.bounds(nuts) if nuts_id is not None else None
+    data= get_seasonal_fwi_data(time, scenario, model, bias=bias, bounds=bounds,
+                                regular=False)
+    nuts_avg = zonal.rotated_average(data, nuts)
 
     return nuts_avg
 
 
+def get_regions(nuts_id=None):
+    if nuts_id is None:
+        return ct.shapes.catalogue.nuts(level=3)
+    return ct.shapes.catalogue.nuts(level=3, nuts_id=[nuts_id])
+
+
 def label_from_value(list_of_dicts, value):
     for i in range(len(list_of_dicts)):
         if list_of_dicts[i]['value'] == value:
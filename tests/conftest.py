@@ -0,0 +1,16 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    """Synthetic catalogue served as ``cdstoolbox``, settings restored after."""
+    from fwi import synthetic
+
+    monkeypatch.setattr(synthetic, 'SETTINGS', dict(synthetic.SETTINGS))
+    synthetic.install(stride=8)
+    return synthetic
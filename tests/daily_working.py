@@ -1,5 +1,8 @@
 import cdstoolbox as ct
 
+from fwi import climatology, pipeline, remap, streaming
+from fwi.cache import retrieve
+
 layout = {
     'input_ncols': 1,
     'output_align': 'right'
@@ -83,6 +86,13 @@ DEPT_DATA = [
 ]
 
 REANALYSIS_PERIOD = (1981, 2005)
+REANALYSIS_VERSION = '3.1'
+EUROPE_EXTENT = [-25, 46, 32, 72]
+
+# Written in the natural order; run with the time mean before regridding
+SEASONAL_MEAN = pipeline.Pipeline([
+    pipeline.make_regular(), pipeline.standardise_time(), pipeline.time_mean(),
+])
 
 TIME_HORIZONS = [
     {
@@ -174,7 +184,7 @@ def child(params,data,data_choice,rcp,time_period):
         elif data_choice=='horizons':
             horizons_data=[]
             for time in TIME_HORIZONS:
-                data = ct.catalogue.retrieve(
+                data = retrieve(
                     'sis-tourism-fire-danger-indicators',
                     {
                         'time_aggregation': 'seasonal_indicators',
@@ -185,10 +195,7 @@ def child(params,data,data_choice,rcp,time_period):
                         'period': time['value'],
                     }
                 )
-                data = ct.geo.make_regular(data, xref='rlon', yref='rlat',
-                                           drop_encoding=['rlon', 'rlat'])
-                data = ct.cdm.standardise_time(data)
-                data = ct.cube.average(data, dim='time')
+                data = SEASONAL_MEAN(data)
                 horizons_data.append(data)
             for hd in range(len(horizons_data)):
                 fig = ct.chart.bar(hd, fig=fig)
@@ -222,7 +229,7 @@ def application(gcm_model,rcp,time_period):
         print('The model '+gcm_model+' is not available for '+rcp)
     
         
-    data = ct.catalogue.retrieve(
+    data = retrieve(
         'sis-tourism-fire-danger-indicators',
         {
             'time_aggregation': 'daily_indicators',
@@ -236,8 +243,8 @@ def application(gcm_model,rcp,time_period):
     
     
     # Make the data plotable
-    data = ct.geo.make_regular(data, xref='rlon', yref='rlat',
-                               drop_encoding=['rlon', 'rlat'])
+    data = remap.make_regular(data, xref='rlon', yref='rlat',
+                              drop_encoding=['rlon', 'rlat'])
     data = ct.cdm.standardise_time(data)
     
     # Define the clickable NUTS shapes
@@ -295,47 +302,52 @@ def application(gcm_model,rcp,time_period):
 
 ### Additional functions ###
 
-def get_reanalysis():
-    yearly_data = []
-    for year in REANALYSIS_PERIOD:
-        data = ct.catalogue.retrieve(
-            'cems-fire-historical',
-            {
-                'product_type': 'reanalysis',
-                'variable': 'fire_weather_index',
-                'version': '3.1',
-                'dataset': 'Consolidated dataset',
-                'year': str(year),
-                'month': [
-                    '06', '07', '08',
-                    '09',
-                ],
-                'day': [
-                    '01', '02', '03',
-                    '04', '05', '06',
-                    '07', '08', '09',
-                    '10', '11', '12',
-                    '13', '14', '15',
-                    '16', '17', '18',
-                    '19', '20', '21',
-                    '22', '23', '24',
-                    '25', '26', '27',
-                    '28', '29', '30',
-                    '31',
-                ],
-            }
-        )
-        data = ct.cube.average(data, dim='time')
-        yearly_data.append(data)
-    data = ct.cube.concat(yearly_data, dim='time')
-    data = ct.cube.average(data, dim='time')
-    data = ct.cube.select(data, [-25, 46, 32, 72])
+def get_reanalysis(version=REANALYSIS_VERSION):
+    # Shares the artefact of 'simple features'/fire_risk.py
+    return climatology.get(
+        'reanalysis-fwi-jjas', lambda: compute_reanalysis(version),
+        version=version, period=REANALYSIS_PERIOD, extent=EUROPE_EXTENT,
+    )
+
+def compute_reanalysis(version=REANALYSIS_VERSION):
+    # One request for the whole period, reduced one year at a time
+    data = streaming.mean_of_yearly_means(
+        'cems-fire-historical',
+        {
+            'product_type': 'reanalysis',
+            'variable': 'fire_weather_index',
+            'version': version,
+            'dataset': 'Consolidated dataset',
+            'year': [
+                str(year) for year in
+                range(REANALYSIS_PERIOD[0], REANALYSIS_PERIOD[1] + 1)
+            ],
+            'month': [
+                '06', '07', '08',
+                '09',
+            ],
+            'day': [
+                '01', '02', '03',
+                '04', '05', '06',
+                '07', '08', '09',
+                '10', '11', '12',
+                '13', '14', '15',
+                '16', '17', '18',
+                '19', '20', '21',
+                '22', '23', '24',
+                '25', '26', '27',
+                '28', '29', '30',
+                '31',
+            ],
+        }
+    )
+    data = ct.cube.select(data, EUROPE_EXTENT)
     return data
 
 def get_data(time, scenario, model_statistic):
 
 
-    data = ct.catalogue.retrieve(
+    data = retrieve(
         'sis-tourism-fire-danger-indicators',
         {
             'time_aggregation': 'seasonal_indicators',
@@ -346,9 +358,7 @@ def get_data(time, scenario, model_statistic):
             'period': time,
         }
     )
-    data = ct.geo.make_regular(data, xref='rlon', yref='rlat',
-                               drop_encoding=['rlon', 'rlat'])
-    data = ct.cube.average(data, dim='time')
+    data = SEASONAL_MEAN(data)
 
     if time != '1981_2005':
         current_climate, _ = get_data(
@@ -0,0 +1,57 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+from fwi import aggregates
+
+
+def sample(shape, seed):
+    rng = np.random.default_rng(seed)
+    values = rng.normal(20.0, 8.0, shape)
+    values[rng.random(shape) < 0.2] = np.nan
+    return values
+
+
+def test_merged_aggregates_match_numpy():
+    chunks = [sample((50, 4), seed) for seed in range(3)]
+    # A region with no valid value in any chunk
+    for chunk in chunks:
+        chunk[:, 3] = np.nan
+    merged = aggregates.merge_all(aggregates.Aggregate.of(c) for c in chunks)
+
+    values = np.concatenate(chunks)
+    np.testing.assert_array_equal(merged.count, np.isfinite(values).sum(axis=0))
+    with warnings.catch_warnings():
+        # All-NaN columns
+        warnings.simplefilter('ignore', RuntimeWarning)
+        expected = {
+            'mean': np.nanmean(values, axis=0),
+            'std': np.nanstd(values, axis=0),
+            'min': np.nanmin(values, axis=0),
+            'max': np.nanmax(values, axis=0),
+        }
+    for name, value in expected.items():
+        np.testing.assert_allclose(merged.statistic(name), value, rtol=1e-9)
+
+
+def test_chunk_stats_over_years():
+    time = pd.date_range('2041-01-01', '2045-12-31', freq='D')
+    values = sample((time.size, 3), 4)
+    data = xr.DataArray(
+        values, dims=('time', 'nuts'),
+        coords={'time': time, 'nuts': ['AA111', 'AA112', 'AA113'],
+                'area': ('nuts', [1.0, 2.0, 3.0])},
+    )
+    stats = aggregates.ChunkStats.from_cube(data.transpose('nuts', 'time'))
+    np.testing.assert_array_equal(stats.years, [2041, 2042, 2043, 2044, 2045])
+
+    selected = stats.select(['AA113', 'AA111'])
+    np.testing.assert_array_equal(selected.areas, [3.0, 1.0])
+    years = time.year
+    window = values[(years >= 2042) & (years <= 2044)][:, [2, 0]]
+    over = selected.over(2042, 2044)
+    np.testing.assert_allclose(over.mean, np.nanmean(window, axis=0), rtol=1e-12)
+    np.testing.assert_allclose(over.std, np.nanstd(window, axis=0), rtol=1e-9)
+    assert stats.over(2050, 2055) is None
@@ -0,0 +1,81 @@
+import threading
+
+import numpy as np
+import pytest
+
+from fwi import cache
+from fwi.benchmark import DAILY_REQUEST
+from fwi.toolbox import catalogue
+
+
+DATASET = 'sis-tourism-fire-danger-indicators'
+
+
+def test_concurrent_retrieves_make_one_call(backend, tmp_path, monkeypatch):
+    # Slow enough that every caller arrives while the first is downloading
+    backend.SETTINGS['latency'] = 0.5
+    calls = []
+    original = catalogue.retrieve
+
+    def counting(dataset, request):
+        calls.append(request)
+        return original(dataset, request)
+
+    monkeypatch.setattr(catalogue, 'retrieve', counting)
+    store = cache.DiskCache(str(tmp_path))
+    start = threading.Barrier(4)
+    results = [None] * 4
+
+    def run(i):
+        start.wait()
+        results[i] = cache.retrieve(DATASET, DAILY_REQUEST, cache=store)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert store.flights.stats()['coalesced'] == 3
+    for result in results[1:]:
+        np.testing.assert_array_equal(result.values, results[0].values)
+
+    cache.retrieve(DATASET, DAILY_REQUEST, cache=store)
+    assert len(calls) == 1
+
+
+def test_single_flight_releases_failed_keys():
+    flights = cache.SingleFlight()
+
+    def fail():
+        raise RuntimeError('catalogue down')
+
+    with pytest.raises(RuntimeError):
+        flights.do('key', fail)
+    assert flights.do('key', lambda: 1) == (1, False)
+    assert flights.stats() == {'executed': 2, 'coalesced': 0, 'in_flight': 0}
+
+
+def test_memoized_calls_record_their_own_cache_result(tmp_path, monkeypatch):
+    import json
+
+    from fwi import tracing
+
+    path = tmp_path / 'trace.jsonl'
+    monkeypatch.setitem(tracing._state, 'path', str(path))
+    monkeypatch.setitem(tracing._state, 'instrumented', True)
+
+    @cache.memoize(cache=cache.DiskCache(str(tmp_path / 'results')))
+    def square(x):
+        return x * x
+
+    @tracing.traced
+    def request():
+        return square(3) + square(3)
+
+    assert request() == 18
+    spans = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [s['name'] for s in spans] == ['request', 'square', 'square']
+    assert 'cache' not in spans[0]['attrs']
+    assert [s['attrs']['cache'] for s in spans[1:]] == ['miss', 'hit']
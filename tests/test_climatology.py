@@ -0,0 +1,44 @@
+import json
+
+import numpy as np
+import pandas as pd
+import shapely
+import xarray as xr
+
+from fwi import climatology
+
+
+def test_artefacts_are_built_once_per_inputs(tmp_path, monkeypatch):
+    monkeypatch.setattr(climatology, 'CLIMATOLOGY_DIR', str(tmp_path))
+    monkeypatch.setattr(climatology, '_loaded', {})
+    builds = []
+
+    def build():
+        builds.append(1)
+        return xr.DataArray(np.arange(4.0), dims=('x',))
+
+    fields = {'version': '4.0', 'period': '1981-2005', 'months': ['06', '07']}
+    first = climatology.get('reanalysis', build, **fields)
+    assert climatology.get('reanalysis', build, **fields) is first
+    assert len(builds) == 1
+
+    # Saved with a sidecar of its inputs, and loaded back by a new process
+    name = climatology.artefact_name('reanalysis', **fields)
+    sidecar = json.loads((tmp_path / f'{name}.json').read_text())
+    assert sidecar == {'artefact_version': climatology.ARTEFACT_VERSION, **fields}
+    monkeypatch.setattr(climatology, '_loaded', {})
+    xr.testing.assert_identical(climatology.get('reanalysis', build, **fields), first)
+    assert len(builds) == 1
+
+    climatology.get('reanalysis', build, **{**fields, 'version': '4.1'})
+    assert len(builds) == 2
+
+
+def test_regions_tag():
+    nuts = pd.DataFrame({
+        'NUTS_ID': ['AA111', 'AA112'],
+        'geometry': [shapely.box(0, 0, 1, 1), shapely.box(1, 0, 2, 1)],
+    })
+    assert climatology.regions_tag(nuts) == climatology.regions_tag(nuts.copy())
+    assert climatology.regions_tag(nuts) != climatology.regions_tag(nuts[:1])
+    assert climatology.regions_tag(object()) == 'toolbox'
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+
+from fwi import grid, rollup, zonal
+from fwi.benchmark import DAILY_REQUEST
+
+
+DATASET = 'sis-tourism-fire-danger-indicators'
+
+
+def region_means(nuts, bounds=None):
+    import cdstoolbox as ct
+
+    request = dict(DAILY_REQUEST)
+    if bounds is not None:
+        request['area'] = grid.to_area(bounds)
+    data = ct.catalogue.retrieve(DATASET, request)
+    if bounds is not None:
+        data = grid.crop_rotated(data, bounds)
+    return data, zonal.rotated_average(data, nuts)
+
+
+def test_cropped_requests_match_the_full_domain(backend):
+    import cdstoolbox as ct
+
+    full_nuts = ct.shapes.catalogue.nuts(level=3)
+    full, expected = region_means(full_nuts)
+    expected = rollup.rollup(expected, 2)
+    for nuts_id in ['AA11', 'AA12']:
+        nuts = ct.shapes.catalogue.nuts(
+            level=3, nuts_id=rollup.children(nuts_id, full_nuts['NUTS_ID']),
+        )
+        data, result = region_means(nuts, zonal.bounds(nuts))
+        assert data['rlat'].size < full['rlat'].size
+        assert data['rlon'].size < full['rlon'].size
+        result = rollup.rollup(result, 2).sel(nuts=nuts_id)
+        assert np.isfinite(result.values).any()
+        np.testing.assert_allclose(
+            result.values, expected.sel(nuts=nuts_id).values, rtol=1e-12,
+        )
+
+
+def test_toolbox_shapes_have_no_bounds():
+    assert zonal.bounds(object()) is None
+    assert zonal.bounds(pd.DataFrame({'NUTS_ID': [], 'geometry': []})) is None
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+from fwi import downsample
+
+
+def test_lttb_keeps_every_danger_class_peak():
+    rng = np.random.default_rng(0)
+    y = rng.uniform(0.0, 5.0, 30000)
+    # Single-day peaks in each class above "very low"
+    peaks = {3000: 6.0, 9000: 12.0, 15000: 25.0, 21000: 40.0, 27000: 60.0}
+    for day, value in peaks.items():
+        y[day] = value
+
+    keep = downsample.lttb(y, 800)
+    assert keep[0] == 0 and keep[-1] == y.size - 1
+    assert np.all(np.diff(keep) > 0)
+    assert keep.size <= 800 + len(peaks)
+    for day in peaks:
+        assert day in keep
+
+    # Every bucket's highest class is still shown
+    edges = np.linspace(1, y.size - 1, 799).astype('int64')
+    classes = downsample.danger_class(y)
+    kept = np.zeros(y.size, dtype=bool)
+    kept[keep] = True
+    for low, high in zip(edges[:-1], edges[1:]):
+        assert classes[low:high][kept[low:high]].max() == classes[low:high].max()
+
+
+def test_downsample_drops_missing_days():
+    time = pd.date_range('2041-01-01', periods=5000, freq='D')
+    values = np.sin(np.arange(time.size) / 50.0) * 20 + 25
+    values[::7] = np.nan
+    data = xr.DataArray(values, dims=('time',), coords={'time': time})
+
+    result = downsample.downsample(data, width=400)
+    assert result.sizes['time'] <= 2 * 400
+    assert np.isfinite(result.values).all()
+    short = data.isel(time=slice(1, 7))
+    assert downsample.downsample(short, width=400) is short
+    cube = object()
+    assert downsample.downsample(cube, width=400) is cube
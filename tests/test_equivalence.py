@@ -0,0 +1,15 @@
+from fwi import equivalence
+
+
+def test_planned_pipelines_match_the_scripts(backend):
+    results = equivalence.run(stride=8)
+    assert sorted(results) == ['daily_nuts_mean', 'seasonal_anomaly', 'seasonal_mean']
+    for name, result in results.items():
+        assert result['ok'], (name, result)
+        # Every script pipeline is reordered
+        assert result['planned'] != result['original'], name
+
+
+def test_command_line_exit_status(backend, capsys):
+    assert equivalence.main(['--stride', '8']) == 0
+    assert 'seasonal_mean' in capsys.readouterr().out
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+import shapely
+import xarray as xr
+
+from fwi import labels, zonal
+
+
+LAT = np.arange(39.25, 46.0, 0.5)
+LON = np.arange(-0.75, 11.0, 0.5)
+
+
+def regions():
+    return pd.DataFrame({
+        'NUTS_ID': ['AA111', 'AA112', 'AA113'],
+        'geometry': [
+            shapely.box(0.0, 40.0, 5.0, 45.0),
+            shapely.Polygon([(5.0, 40.0), (10.0, 40.0), (10.0, 45.0)]),
+            # Between cell centres, so without any cell
+            shapely.box(10.6, 40.1, 10.7, 40.2),
+        ],
+    })
+
+
+def cube(rng):
+    values = rng.normal(20.0, 5.0, (4, LAT.size, LON.size))
+    values[rng.random(values.shape) < 0.2] = np.nan
+    return xr.DataArray(
+        values, dims=('time', 'lat', 'lon'),
+        coords={'time': np.arange(4), 'lat': LAT, 'lon': LON},
+    )
+
+
+def test_order_statistics_match_numpy():
+    data = cube(np.random.default_rng(0))
+    nuts = regions()
+    names = ['count', 'min', 'median', 'p90', 'max']
+    result = labels.zonal_statistics(data, nuts, names)
+    assert result.dims == ('statistic', 'time', 'nuts')
+    assert result['statistic'].values.tolist() == names
+
+    lat, lon = np.meshgrid(LAT, LON, indexing='ij')
+    for r, geom in enumerate(nuts['geometry']):
+        inside = shapely.contains_xy(geom, lon, lat)
+        for t in range(4):
+            sample = data.values[t][inside]
+            sample = sample[np.isfinite(sample)]
+            got = result.isel(time=t, nuts=r)
+            assert got.sel(statistic='count') == sample.size
+            if not sample.size:
+                assert np.isnan(got.sel(statistic='median'))
+                continue
+            for name, q in [('min', 0.0), ('median', 0.5), ('p90', 0.9), ('max', 1.0)]:
+                np.testing.assert_allclose(
+                    got.sel(statistic=name), np.quantile(sample, q), rtol=1e-12,
+                )
+
+
+def test_means_equal_the_zonal_average():
+    data = cube(np.random.default_rng(1))
+    nuts = regions()
+    for all_touched in (False, True):
+        np.testing.assert_allclose(
+            labels.zonal_statistics(data, nuts, 'mean', all_touched).values,
+            zonal.average(data, nuts, all_touched).values,
+            rtol=1e-12, equal_nan=True,
+        )
+
+
+def test_unknown_statistics_are_rejected():
+    with pytest.raises(ValueError):
+        labels.zonal_statistics(cube(np.random.default_rng(2)), regions(), 'p150')
+
+
+def test_toolbox_cubes_only_support_the_mean(backend, monkeypatch):
+    import cdstoolbox as ct
+
+    monkeypatch.setattr(ct.shapes, 'average', lambda data, nuts, **kwargs: 'toolbox')
+    assert labels.zonal_statistics(object(), regions(), 'mean') == 'toolbox'
+    with pytest.raises(ValueError):
+        labels.zonal_statistics(object(), regions(), 'median')
@@ -0,0 +1,102 @@
+import threading
+import time
+
+import numpy as np
+
+from fwi import cache, planner
+from fwi.benchmark import DAILY_REQUEST
+from fwi.toolbox import catalogue
+
+
+DATASET = 'sis-tourism-fire-danger-indicators'
+
+YEARS = [str(year) for year in range(2041, 2051)]
+
+
+def counting(monkeypatch):
+    calls = []
+    original = catalogue.retrieve
+
+    def retrieve(dataset, request):
+        calls.append(request)
+        return original(dataset, request)
+
+    monkeypatch.setattr(catalogue, 'retrieve', retrieve)
+    return calls
+
+
+def test_plan_skips_cached_chunks_and_batches_the_rest(tmp_path):
+    store = cache.DiskCache(str(tmp_path))
+    store.put(cache.request_key(DATASET, {**DAILY_REQUEST, 'period': '2043'}), 1)
+    result = planner.plan(
+        DATASET, DAILY_REQUEST, YEARS, 2042, 2048,
+        cached=lambda year: year == '2047', batch_size=2, cache=store,
+    )
+    assert result.chunks == YEARS[1:8]
+    assert result.cached == ['2043', '2047']
+    assert result.batches == [['2042', '2044'], ['2045', '2046'], ['2048']]
+
+
+def test_fetch_caches_every_chunk_of_a_batch(backend, tmp_path, monkeypatch):
+    calls = counting(monkeypatch)
+    store = cache.DiskCache(str(tmp_path))
+    result = planner.plan(DATASET, DAILY_REQUEST, YEARS, 2041, 2043, cache=store)
+    reduced = {}
+    planner.fetch(result, cache=store, reduce=lambda chunk, data: reduced.update(
+        {chunk: float(np.nanmean(data.values))}))
+    assert len(calls) == 1 and calls[0]['period'] == ['2041', '2042', '2043']
+    assert sorted(reduced) == ['2041', '2042', '2043']
+
+    for year in ['2041', '2042', '2043']:
+        data = cache.retrieve(DATASET, {**DAILY_REQUEST, 'period': year}, cache=store)
+        assert set(data['time'].dt.year.values) == {int(year)}
+        assert float(np.nanmean(data.values)) == reduced[year]
+    assert len(calls) == 1
+    assert store.stats()['misses'] == 1
+
+
+def test_retrieve_during_a_single_chunk_fill_gets_data(backend, tmp_path, monkeypatch):
+    # The batch request of one chunk has the same key as the chunk's retrieve
+    backend.SETTINGS['latency'] = 0.5
+    calls = counting(monkeypatch)
+    store = cache.DiskCache(str(tmp_path))
+    result = planner.plan(DATASET, DAILY_REQUEST, YEARS, 2041, 2041, cache=store)
+    fetching = threading.Thread(target=planner.fetch, args=(result, store))
+    fetching.start()
+    time.sleep(0.1)
+    data = cache.retrieve(DATASET, {**DAILY_REQUEST, 'period': '2041'}, cache=store)
+    fetching.join()
+
+    assert data is not None
+    assert set(data['time'].dt.year.values) == {2041}
+    assert len(calls) <= 2
+
+
+def test_concurrent_fetches_of_a_batch_download_it_once(backend, tmp_path, monkeypatch):
+    backend.SETTINGS['latency'] = 0.5
+    calls = counting(monkeypatch)
+    store = cache.DiskCache(str(tmp_path))
+    plans = [
+        planner.plan(DATASET, DAILY_REQUEST, YEARS, 2041, 2042, cache=store)
+        for _ in range(3)
+    ]
+    threads = [
+        threading.Thread(target=planner.fetch, args=(p, store)) for p in plans
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert store.stats()['coalesced'] == 2
+
+
+def test_toolbox_batches_are_split_with_cube_select(backend, monkeypatch):
+    import cdstoolbox as ct
+
+    monkeypatch.setattr(ct.cube, 'select', lambda data, **kwargs: kwargs)
+    parts = planner._split(object(), ['2041_2045', '2046_2050'])
+    assert parts == {
+        '2041_2045': {'start_time': '2041', 'stop_time': '2045'},
+        '2046_2050': {'start_time': '2046', 'stop_time': '2050'},
+    }
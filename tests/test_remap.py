@@ -0,0 +1,53 @@
+import numpy as np
+import xarray as xr
+from scipy.interpolate import RegularGridInterpolator
+
+from fwi import grid, remap
+
+
+RLAT = grid.RLAT[::8]
+RLON = grid.RLON[::8]
+
+
+def rotated_cube(values, rlat=RLAT, rlon=RLON):
+    return xr.DataArray(
+        values, dims=('time', 'rlat', 'rlon'),
+        coords={'time': np.arange(values.shape[0]), 'rlat': rlat, 'rlon': rlon},
+    )
+
+
+def test_make_regular_matches_bilinear_interpolation():
+    rng = np.random.default_rng(0)
+    values = rng.normal(20.0, 5.0, (2, RLAT.size, RLON.size))
+    result = remap.make_regular(rotated_cube(values))
+    assert result.dims == ('time', 'lat', 'lon')
+
+    lat, lon = np.meshgrid(result['lat'].values, result['lon'].values, indexing='ij')
+    rlat, rlon = grid.rotate(lat.ravel(), lon.ravel())
+    points = np.stack([rlat, rlon], axis=-1)
+    for t in range(2):
+        expected = RegularGridInterpolator(
+            (RLAT, RLON), values[t], bounds_error=False, fill_value=np.nan,
+        )(points).reshape(lat.shape)
+        np.testing.assert_array_equal(np.isnan(result.values[t]), np.isnan(expected))
+        np.testing.assert_allclose(result.values[t], expected, rtol=1e-12, equal_nan=True)
+    assert np.isfinite(result.values).mean() > 0.5
+
+
+def test_descending_axes_give_the_same_field():
+    rng = np.random.default_rng(1)
+    values = rng.normal(20.0, 5.0, (1, RLAT.size, RLON.size))
+    expected = remap.make_regular(rotated_cube(values))
+    flipped = rotated_cube(values[:, ::-1, ::-1], RLAT[::-1], RLON[::-1])
+    np.testing.assert_allclose(
+        remap.make_regular(flipped).values, expected.values, rtol=1e-12,
+    )
+
+
+def test_toolbox_cubes_are_passed_on(backend, monkeypatch):
+    import cdstoolbox as ct
+
+    monkeypatch.setattr(ct.geo, 'make_regular', lambda data, **kwargs: kwargs)
+    assert remap.make_regular(object(), drop_encoding=['rlon', 'rlat']) == {
+        'xref': 'rlon', 'yref': 'rlat', 'drop_encoding': ['rlon', 'rlat'],
+    }
@@ -0,0 +1,50 @@
+import numpy as np
+import xarray as xr
+
+from fwi import rollup, zonal
+
+
+def test_ids():
+    assert rollup.level_of('FRK26') == 3 and rollup.level_of('FR') == 0
+    assert rollup.parent_of('FRK26', 1) == 'FRK'
+    assert rollup.children('FRK', ['FRK26', 'FRK27', 'FRL01']) == ['FRK26', 'FRK27']
+
+
+def test_rollup_matches_area_weighted_numpy_means():
+    ids = ['AA111', 'AA112', 'AA121', 'AA211']
+    areas = np.array([1.0, 3.0, 2.0, 5.0])
+    values = np.array([[10.0, 20.0, 30.0, 40.0], [np.nan, 8.0, np.nan, np.nan]])
+    data = xr.DataArray(
+        values, dims=('time', 'nuts'),
+        coords={'time': [0, 1], 'nuts': ids, 'area': ('nuts', areas)},
+    )
+    result = rollup.rollup(data, 1)
+    assert result.dims == ('time', 'nuts')
+    assert result['nuts'].values.tolist() == ['AA1', 'AA2']
+    expected = [
+        [(10 * 1 + 20 * 3 + 30 * 2) / 6, 40.0],
+        [8.0, np.nan],
+    ]
+    np.testing.assert_allclose(result.values, expected)
+    # Summed areas of valid children, so the result rolls up again
+    np.testing.assert_array_equal(result['area'].values, [6.0, 5.0])
+    np.testing.assert_allclose(rollup.rollup(result, 0).values, [[30.0], [8.0]])
+    np.testing.assert_allclose(rollup.rollup(data, 0).values, [[30.0], [8.0]])
+
+
+def test_rollup_equals_averaging_parent_regions(backend):
+    import cdstoolbox as ct
+
+    data = ct.catalogue.retrieve('sis-tourism-fire-danger-indicators', {
+        'time_aggregation': 'seasonal_indicators',
+        'product_type': 'single_model',
+        'variable': 'seasonal_fire_weather_index',
+        'gcm_model': 'ec_earth',
+        'experiment': 'rcp4_5',
+        'period': '2041_2045',
+    })
+    level3 = zonal.rotated_average(data, ct.shapes.catalogue.nuts(level=3))
+    for level in (2, 0):
+        direct = zonal.rotated_average(data, ct.shapes.catalogue.nuts(level=level))
+        rolled = rollup.rollup(level3, level).sel(nuts=direct['nuts'].values)
+        np.testing.assert_allclose(rolled.values, direct.values, rtol=1e-5)
@@ -0,0 +1,67 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+from fwi import rollup, series
+
+
+IDS = ['AA111', 'AA112', 'AA121', 'AB111']
+
+
+def partition(year):
+    rng = np.random.default_rng(year)
+    time = pd.date_range(f'{year}-01-01', f'{year}-12-31', freq='D')
+    values = rng.gamma(2.0, 5.0, (time.size, len(IDS)))
+    values[rng.random(values.shape) < 0.1] = np.nan
+    return xr.DataArray(
+        values.astype('float32'), dims=('time', 'nuts'),
+        coords={'time': time, 'nuts': IDS, 'area': ('nuts', [1.0, 2.0, 3.0, 4.0])},
+    )
+
+
+def test_read_matches_the_partitions(tmp_path):
+    store = series.DailySeriesStore('test', 2006, 2015, directory=str(tmp_path))
+    assert store.read('AA111', 2007, 2009) is None
+    store.fill(2007, 2009, partition)
+    assert store.missing(2006, 2010) == [2006, 2010]
+    assert store.path.endswith(f'test-v{series.STORE_VERSION}.zarr')
+    assert store._group['values'].chunks == (series.REGION_BLOCK, series.SLOTS)
+
+    days = xr.concat([partition(y) for y in (2007, 2008, 2009)], 'time')
+    result = store.read('AA112', 2007, 2009)
+    np.testing.assert_array_equal(result['time'].values, days['time'].values)
+    np.testing.assert_array_equal(result.values, days.sel(nuts='AA112').values)
+
+    # Higher levels roll up the NUTS 3 children
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        expected = rollup.rollup(days, 1).sel(nuts='AA1')
+    result = store.read('AA1', 2008, 2009)
+    np.testing.assert_allclose(
+        result.values, expected.sel(time=slice('2008', '2009')).values, rtol=1e-6,
+    )
+    assert store.read('ZZ1', 2007, 2009) is None
+
+
+def test_only_missing_years_are_written(tmp_path):
+    store = series.DailySeriesStore('test', 2006, 2015, directory=str(tmp_path))
+    computed = []
+
+    def counting(year):
+        computed.append(year)
+        return partition(year)
+
+    store.fill(2008, 2009, counting)
+    store.fill(2006, 2011, counting)
+    assert computed == [2008, 2009, 2006, 2007, 2010, 2011]
+
+    # Shared by name through the handle
+    handle = store.handle()
+    assert handle == {'name': 'test', 'first_year': 2006, 'last_year': 2015}
+    reloaded = series.DailySeriesStore('test', 2006, 2015, directory=str(tmp_path))
+    np.testing.assert_array_equal(
+        reloaded.read('AB111', 2006, 2011).values,
+        store.read('AB111', 2006, 2011).values,
+    )
@@ -0,0 +1,48 @@
+import warnings
+
+import numpy as np
+import xarray as xr
+
+from fwi import streaming
+
+
+def test_running_mean_matches_nanmean():
+    rng = np.random.default_rng(0)
+    fields = rng.normal(15.0, 5.0, (12, 6, 8))
+    fields[rng.random(fields.shape) < 0.3] = np.nan
+    # A cell that is never valid
+    fields[:, 0, 0] = np.nan
+
+    running = streaming.RunningMean()
+    for field in fields:
+        running.update(xr.DataArray(field, dims=('lat', 'lon')))
+    result = running.result()
+
+    with warnings.catch_warnings():
+        # The cell that is never valid
+        warnings.simplefilter('ignore', RuntimeWarning)
+        expected = np.nanmean(fields, axis=0)
+    np.testing.assert_allclose(result.values, expected, rtol=1e-12)
+    assert np.isnan(result.values[0, 0])
+
+
+def test_mean_of_yearly_means(backend):
+    import cdstoolbox as ct
+
+    request = {
+        'product_type': 'reanalysis',
+        'variable': 'fire_weather_index',
+        'version': '4.0',
+        'dataset': 'Consolidated dataset',
+        'year': ['2001', '2002', '2003'],
+        'month': ['06', '07'],
+    }
+    result = streaming.mean_of_yearly_means('cems-fire-historical', request)
+
+    yearly = [
+        ct.catalogue.retrieve('cems-fire-historical', {**request, 'year': year})
+        .mean('time').values
+        for year in request['year']
+    ]
+    np.testing.assert_allclose(result.values, np.mean(yearly, axis=0), rtol=1e-5)
+    assert result.attrs['units'] == '1'
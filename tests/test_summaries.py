@@ -0,0 +1,65 @@
+import numpy as np
+import xarray as xr
+
+from fwi import summaries
+
+
+def cube(values, models=None):
+    values = np.asarray(values, dtype='float64')
+    models = models or [f'model_{i}' for i in range(values.shape[0])]
+    dims = ('gcm_model',) + tuple(f'dim_{i}' for i in range(values.ndim - 1))
+    return xr.DataArray(values, dims=dims, coords={'gcm_model': models})
+
+
+def reference(values):
+    values = np.asarray(values, dtype='float64')
+    values = values[np.isfinite(values)]
+    q1, median, q3 = np.percentile(values, [25, 50, 75])
+    low, high = q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1)
+    inside = values[(values >= low) & (values <= high)]
+    return {
+        'q1': q1, 'median': median, 'q3': q3, 'mean': values.mean(),
+        'lowerfence': inside.min(), 'upperfence': inside.max(),
+        'outliers': sorted(values[(values < low) | (values > high)].tolist()),
+    }
+
+
+def test_box_summaries_match_numpy():
+    groups = [
+        [10.0, 11.0, 12.0, 13.0, 14.0, 40.0],
+        [5.0, np.nan, 7.0, 8.0],
+        [3.0, 3.5, -20.0, 4.0, 4.5, 5.0, 30.0],
+    ]
+    result = summaries.box_summaries([cube(g) for g in groups])
+    assert len(result) == 3
+    for summary, group in zip(result, groups):
+        expected = reference(group)
+        assert sorted(summary['outliers']) == expected.pop('outliers')
+        for name, value in expected.items():
+            assert np.isclose(summary[name], value), name
+
+
+def test_box_summaries_over_other_dims():
+    rng = np.random.default_rng(0)
+    values = rng.normal(20.0, 5.0, (6, 4))
+    values[0, 1] = 100.0
+    result = summaries.box_summaries([cube(values)])[0]
+    for column in range(values.shape[1]):
+        expected = reference(values[:, column])
+        outliers = result['outliers'][:, column]
+        assert sorted(outliers[np.isfinite(outliers)].tolist()) == expected.pop('outliers')
+        for name, value in expected.items():
+            assert np.isclose(result[name][column], value), name
+
+
+def test_box_trace_fields():
+    summary = summaries.box_summaries([cube([1.0, 2.0, 3.0, 4.0, 50.0])])[0]
+    data, kwargs = summaries.box_trace(summary, '2041-2070')
+    np.testing.assert_allclose(
+        data.values,
+        [summary[f] for f in ('lowerfence', 'q1', 'median', 'q3', 'upperfence')],
+    )
+    assert kwargs['name'] == '2041-2070' and kwargs['q1'] == [summary['q1']]
+    points = summaries.outlier_points(summary, '2041-2070')
+    assert points.values.tolist() == [50.0]
+    assert points['box'].values.tolist() == ['2041-2070']
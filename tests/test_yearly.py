@@ -0,0 +1,72 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+from fwi import yearly
+
+
+IDS = ['AA111', 'AA112', 'AA113']
+
+
+def daily_cube(year, rng):
+    time = pd.date_range(f'{year}-01-01', f'{year}-12-31', freq='D')
+    values = rng.gamma(2.0, 5.0, (time.size, len(IDS)))
+    values[rng.random(values.shape) < 0.1] = np.nan
+    if year == 2009:
+        # A region without any valid day this year
+        values[:, 2] = np.nan
+    return xr.DataArray(
+        values, dims=('time', 'nuts'),
+        coords={'time': time, 'nuts': IDS, 'area': ('nuts', [1.0, 2.0, 3.0])},
+    )
+
+
+def test_prefix_sum_means_match_numpy(tmp_path):
+    rng = np.random.default_rng(0)
+    cubes = {year: daily_cube(year, rng) for year in range(2006, 2016)}
+    store = yearly.YearlyStore('test', 2006, 2015, directory=str(tmp_path))
+    store.fill(2006, 2015, lambda year: yearly.totals(cubes[year]))
+
+    for start, stop in [(2006, 2015), (2008, 2012), (2009, 2009), (2015, 2015)]:
+        days = np.concatenate([cubes[y].values for y in range(start, stop + 1)])
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            expected = np.nanmean(days, axis=0)
+        mean = store.mean(start, stop)
+        assert mean['nuts'].values.tolist() == IDS
+        np.testing.assert_allclose(mean.values, expected, rtol=1e-12)
+        np.testing.assert_array_equal(mean['area'].values, [1.0, 2.0, 3.0])
+
+    # The saved store gives the same means
+    reloaded = yearly.YearlyStore('test', 2006, 2015, directory=str(tmp_path))
+    assert reloaded.missing(2006, 2015) == []
+    np.testing.assert_array_equal(
+        reloaded.mean(2008, 2012).values, store.mean(2008, 2012).values,
+    )
+
+
+def test_only_missing_years_are_computed(tmp_path):
+    rng = np.random.default_rng(1)
+    cubes = {year: daily_cube(year, rng) for year in range(2006, 2011)}
+    store = yearly.YearlyStore('test', 2006, 2010, directory=str(tmp_path))
+    computed = []
+
+    def totals(year):
+        computed.append(year)
+        return yearly.totals(cubes[year])
+
+    store.fill(2007, 2008, totals)
+    store.fill(2006, 2010, totals)
+    assert computed == [2007, 2008, 2006, 2009, 2010]
+
+
+def test_stores_of_an_older_layout_are_not_read(tmp_path):
+    # Saved before areas were kept, without a version in the file name
+    np.savez(
+        tmp_path / 'test.npz', ids=np.asarray(IDS), filled=np.ones(5, bool),
+        sums=np.ones((5, 3)), counts=np.ones((5, 3)),
+    )
+    store = yearly.YearlyStore('test', 2006, 2010, directory=str(tmp_path))
+    assert store.missing(2006, 2010) == [2006, 2007, 2008, 2009, 2010]
@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+import shapely
+import xarray as xr
+
+from fwi import zonal
+
+
+def regions():
+    return pd.DataFrame({
+        'NUTS_ID': ['AA111', 'AA112'],
+        'NUTS_NAME': ['West', 'East'],
+        'geometry': [
+            shapely.box(0.0, 40.0, 5.0, 45.0),
+            shapely.Polygon([(5.0, 40.0), (10.0, 40.0), (10.0, 45.0)]),
+        ],
+    })
+
+
+def brute_force(values, lat, lon, nuts, all_touched=False):
+    """Area-weighted nanmean of the cells of each region, cell by cell."""
+    lat_edges, lon_edges = zonal.cell_edges(lat), zonal.cell_edges(lon)
+    means = []
+    for geom in nuts['geometry']:
+        total = weight = 0.0
+        for i, y in enumerate(lat):
+            for j, x in enumerate(lon):
+                if all_touched:
+                    cell = shapely.box(
+                        lon_edges[j], lat_edges[i], lon_edges[j + 1], lat_edges[i + 1],
+                    )
+                    inside = geom.intersects(cell)
+                else:
+                    inside = geom.contains(shapely.Point(x, y))
+                if inside and np.isfinite(values[i, j]):
+                    area = (np.cos(np.deg2rad(y)) * (lat_edges[i + 1] - lat_edges[i])
+                            * (lon_edges[j + 1] - lon_edges[j]))
+                    total += area * values[i, j]
+                    weight += area
+        means.append(total / weight)
+    return np.asarray(means)
+
+
+def test_average_matches_cell_by_cell_means():
+    rng = np.random.default_rng(0)
+    lat = np.arange(39.25, 46.0, 0.5)
+    lon = np.arange(-0.75, 11.0, 0.5)
+    values = rng.normal(20.0, 5.0, (3, lat.size, lon.size))
+    values[rng.random(values.shape) < 0.2] = np.nan
+    data = xr.DataArray(
+        values, dims=('time', 'lat', 'lon'),
+        coords={'time': [0, 1, 2], 'lat': lat, 'lon': lon},
+    )
+    nuts = regions()
+    for all_touched in (False, True):
+        result = zonal.average(data, nuts, all_touched=all_touched)
+        assert result.dims == ('time', 'nuts')
+        assert result['nuts'].values.tolist() == ['AA111', 'AA112']
+        assert result['NUTS_NAME'].values.tolist() == ['West', 'East']
+        for t in range(3):
+            expected = brute_force(values[t], lat, lon, nuts, all_touched)
+            np.testing.assert_allclose(result.values[t], expected, rtol=1e-12)
+
+
+def test_toolbox_cubes_are_passed_on(backend, monkeypatch):
+    import cdstoolbox as ct
+
+    monkeypatch.setattr(ct.shapes, 'average', lambda data, nuts, **kwargs: kwargs)
+    assert zonal.average(object(), regions(), all_touched=True) == {'all_touched': True}
+
+
+def test_rotated_average_matches_cell_by_cell_means():
+    from fwi import grid
+
+    rng = np.random.default_rng(1)
+    rlat, rlon = grid.RLAT[150:260:4], grid.RLON[150:260:4]
+    values = rng.normal(20.0, 5.0, (2, rlat.size, rlon.size))
+    values[rng.random(values.shape) < 0.2] = np.nan
+    data = xr.DataArray(
+        values, dims=('time', 'rlat', 'rlon'),
+        coords={'time': [0, 1], 'rlat': rlat, 'rlon': rlon},
+    )
+    lat, lon = grid.unrotate(*np.meshgrid(rlat, rlon, indexing='ij'))
+    west, south = lon.min(), lat.min()
+    east, north = lon.max(), lat.max()
+    nuts = pd.DataFrame({
+        'NUTS_ID': ['AA111', 'AA112'],
+        'geometry': [
+            shapely.box(west, south, (west + east) / 2, north),
+            shapely.box((west + east) / 2, south, east, (south + north) / 2),
+        ],
+    })
+    result = zonal.rotated_average(data, nuts)
+    assert result.dims == ('time', 'nuts')
+
+    # Rotated cells count where their centre falls, with their rotated area
+    area = np.cos(np.deg2rad(rlat))[:, None] * np.ones(rlon.size)
+    for r, geom in enumerate(nuts['geometry']):
+        inside = shapely.contains_xy(geom, lon, lat)
+        assert inside.any()
+        for t in range(2):
+            valid = inside & np.isfinite(values[t])
+            expected = (area * values[t])[valid].sum() / area[valid].sum()
+            np.testing.assert_allclose(result.values[t, r], expected, rtol=1e-12)
+
+
+def test_rotated_toolbox_cubes_are_regridded_and_passed_on(backend, monkeypatch):
+    import cdstoolbox as ct
+
+    monkeypatch.setattr(ct.geo, 'make_regular', lambda data, **kwargs: ('regular', data))
+    monkeypatch.setattr(ct.shapes, 'average', lambda data, nuts, **kwargs: data)
+    cube = object()
+    assert zonal.rotated_average(cube, regions()) == ('regular', cube)